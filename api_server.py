@@ -0,0 +1,466 @@
+import asyncio
+import hashlib
+import heapq
+import json
+import os
+import signal
+import time
+from itertools import islice
+from urllib.parse import parse_qs, unquote, urlsplit
+from movie_app_project.istorage import storage_paths
+from movie_app_project.metrics import PROMETHEUS_CONTENT_TYPE
+from movie_app_project.movie import Movie, movie_row
+from movie_app_project.omdb import OmdbError, OmdbRequestError
+from movie_app_project.rating_index import RatingIndex
+from movie_app_project.search_index import SearchIndex
+
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+MAX_PAGE_SIZE = 1000
+ROUTES = ("movies", "search", "top", "stats", "metrics")
+REASONS = {
+    200: "OK", 201: "Created", 204: "No Content", 304: "Not Modified", 400: "Bad Request",
+    404: "Not Found", 405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+    500: "Internal Server Error", 502: "Bad Gateway",
+}
+
+
+class HttpError(Exception):
+    """
+    Raised by a request handler to answer with an error status and a JSON message.
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class LibraryView:
+    """
+    The in-memory copy of the library that all requests are answered from.
+
+    It holds the movies together with a rating index for top-N and statistics and an
+    n-gram index for search. Every change bumps `version`, which the server uses in the
+    ETag of its responses together with `instance`, a random value drawn when the view is
+    created, so ETags from before a restart never match. The storage files (all shards of
+    a sharded library) are checked at most every `reload_interval` seconds and the view
+    is reloaded if someone else changed them.
+    """
+
+    def __init__(self, storage, reload_interval=1.0):
+        """
+        Initialize the LibraryView.
+
+        Args:
+            storage (IStorage): The storage the view is loaded from.
+            reload_interval (float): Minimum seconds between checks for outside changes.
+        """
+        self._storage = storage
+        self._reload_interval = reload_interval
+        self._source_paths = [path + suffix for path in storage_paths(storage) for suffix in ('', '.log', '-wal')]
+        self._signature = None
+        self._checked = 0.0
+        self.instance = os.urandom(4).hex()
+        self.version = 0
+        self.movies = {}
+        self.ratings = RatingIndex()
+        self.search = SearchIndex(None)
+
+    def _source_signature(self):
+        """Returns the mtime and size of the storage files."""
+        signature = []
+        for path in self._source_paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return signature
+
+    def load(self):
+        """Reads the whole library from the storage and rebuilds the indexes."""
+        signature = self._source_signature()
+        movies = {title: Movie.from_dict(details) for title, details in self._storage.list_movies().items()}
+        self.movies = movies
+        self.ratings = RatingIndex.from_movies(movies)
+        self.search.rebuild(movies)
+        self._signature = signature
+        self._checked = time.monotonic()
+        self.version += 1
+
+    def is_stale(self):
+        """Returns whether the storage files changed since the view was loaded, checking at most once per interval."""
+        now = time.monotonic()
+        if not self._source_paths or now - self._checked < self._reload_interval:
+            return False
+        self._checked = now
+        return self._source_signature() != self._signature
+
+    def changed(self):
+        """Records a change made through the view, so it does not count as an outside change."""
+        self._signature = self._source_signature()
+        self.version += 1
+
+    def add(self, title, movie):
+        """Adds a movie to the view."""
+        self.movies[title] = movie
+        self.ratings.add(title, movie)
+        self.search.add(title, movie)
+        self.changed()
+
+    def update(self, title, rating, notes):
+        """Changes the rating and, if given, the notes of a movie in the view."""
+        movie = self.movies[title]
+        movie['rating'] = rating
+        if notes is not None:
+            movie['notes'] = notes
+        self.ratings.update(title, movie['rating'])
+        self.changed()
+
+    def delete(self, title):
+        """Removes a movie from the view."""
+        del self.movies[title]
+        self.ratings.remove(title)
+        self.search.remove(title)
+        self.changed()
+
+
+def _int_param(query, name, default, minimum=0, maximum=None):
+    """Reads an integer query parameter, answering 400 if it is not a valid number."""
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        value = int(values[0])
+    except ValueError:
+        raise HttpError(400, f"'{name}' must be an integer.")
+    if value < minimum or (maximum is not None and value > maximum):
+        raise HttpError(400, f"'{name}' must be between {minimum} and {maximum}.")
+    return value
+
+
+def _route(target):
+    """The endpoint of a request target, e.g. '/movies' for '/movies/Alien', as a metric label."""
+    first = urlsplit(target).path.strip("/").split("/")[0]
+    return "/" + first if first in ROUTES else "other"
+
+
+def _etag_matches(header, etag):
+    """Returns whether an If-None-Match header matches an ETag."""
+    if header is None:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class ApiServer:
+    """
+    HTTP server with a JSON API over a movie library, built on asyncio streams.
+
+    Endpoints:
+        GET    /movies?offset=&limit=      a page of movies, streamed in chunks
+        GET    /movies/<title>             one movie
+        POST   /movies                     add a movie (JSON body with at least a title)
+        PATCH  /movies/<title>             change rating and notes (JSON body)
+        DELETE /movies/<title>             delete a movie
+        GET    /search?q=&limit=&fuzzy=1   titles matching a query, best first
+        GET    /top?n=&by=rating|year      best rated or newest movies
+        GET    /stats                      count, average, median, best and worst
+        GET    /metrics                    request latencies and other metrics in Prometheus
+                                           text format, if the server was given Metrics
+
+    Reads are answered from one shared LibraryView without touching the storage.
+    Changes are written to the storage in a worker thread, one at a time, and then
+    applied to the view. GET responses carry an ETag derived from the library version
+    and the request, and a matching If-None-Match is answered with 304. A failed OMDb
+    lookup for POST /movies is answered with 502.
+    """
+
+    def __init__(self, storage, host="127.0.0.1", port=8000, page_size=100, omdb=None, reload_interval=1.0,
+                 metrics=None):
+        """
+        Initialize the ApiServer.
+
+        Args:
+            storage (IStorage): The library to serve.
+            host (str): Address to listen on.
+            port (int): Port to listen on, 0 picks a free one.
+            page_size (int): Number of movies per page when the request gives no limit.
+            omdb (OmdbClient): If given, POST /movies with only a title looks the movie up.
+            reload_interval (float): Minimum seconds between checks for outside changes to the storage.
+            metrics (Metrics): If given, the latency of every request is recorded per route and status.
+        """
+        self._storage = storage
+        self._host = host
+        self._port = port
+        self._page_size = page_size
+        self._omdb = omdb
+        self._view = LibraryView(storage, reload_interval)
+        self._metrics = metrics
+        self._write_lock = None
+        self._server = None
+
+    @property
+    def port(self):
+        """The port the server listens on, once started."""
+        return self._server.sockets[0].getsockname()[1] if self._server else self._port
+
+    async def start(self):
+        """Load the library and start listening."""
+        self._write_lock = asyncio.Lock()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._view.load)
+        self._server = await asyncio.start_server(self._handle_connection, self._host, self._port,
+                                                  limit=MAX_HEADER_BYTES)
+        return self._server
+
+    async def serve_forever(self):
+        """Start the server and serve until cancelled or terminated, then write back buffered changes."""
+        await self.start()
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except (NotImplementedError, AttributeError):  # Windows event loops have no signal handlers
+            pass
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            self._storage.flush()
+
+    async def _handle_connection(self, reader, writer):
+        """Answers requests on one keep-alive connection until the client closes it."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    return
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, 413, self._json_body({'error': "Request headers too large."}))
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ")
+                except ValueError:
+                    await self._send(writer, 400, self._json_body({'error': "Malformed request line."}))
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    await self._send(writer, 400, self._json_body({'error': "Invalid Content-Length."}))
+                    return
+                if length > MAX_BODY_BYTES:
+                    await self._send(writer, 413, self._json_body({'error': "Request body too large."}))
+                    return
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and (version == "HTTP/1.1" or headers.get("connection", "").lower() == "keep-alive"))
+                start = time.perf_counter()
+                status, extra_headers, content = await self._respond(method, target, headers, body)
+                await self._send(writer, status, content, extra_headers, keep_alive)
+                if self._metrics is not None:
+                    self._metrics.observe('http_request_seconds', time.perf_counter() - start,
+                                          method=method, route=_route(target), status=status)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, method, target, headers, body):
+        """Runs the handler for a request and turns errors into JSON error responses."""
+        try:
+            if self._view.is_stale():
+                async with self._write_lock:
+                    await asyncio.get_running_loop().run_in_executor(None, self._view.load)
+            url = urlsplit(target)
+            query = parse_qs(url.query)
+            parts = [unquote(part) for part in url.path.strip("/").split("/")]
+            if method == "GET" and parts == ["metrics"] and self._metrics is not None:
+                return 200, [("Content-Type", PROMETHEUS_CONTENT_TYPE)], self._metrics.render().encode("utf-8")
+            if method == "GET":
+                etag = '"%s-%d-%s"' % (self._view.instance, self._view.version,
+                                       hashlib.blake2b(target.encode(), digest_size=8).hexdigest())
+                if _etag_matches(headers.get("if-none-match"), etag):
+                    return 304, [("ETag", etag)], None
+                return 200, [("ETag", etag)], self._get(parts, query)
+            if method == "POST" and parts == ["movies"]:
+                return 201, [], self._json_body(await self._add(self._json_request(body)))
+            if method == "PATCH" and len(parts) == 2 and parts[0] == "movies":
+                return 200, [], self._json_body(await self._update(parts[1], self._json_request(body)))
+            if method == "DELETE" and len(parts) == 2 and parts[0] == "movies":
+                await self._delete(parts[1])
+                return 204, [], None
+            raise HttpError(405 if parts[0] in ("movies", "search", "top", "stats") else 404,
+                            f"{method} {url.path} is not supported.")
+        except HttpError as e:
+            return e.status, [], self._json_body({'error': str(e)})
+        except Exception as e:
+            print(f"Error handling {method} {target}: {e!r}")
+            return 500, [], self._json_body({'error': "Internal server error."})
+
+    def _get(self, parts, query):
+        """Returns the body of a GET request."""
+        view = self._view
+        if parts == ["movies"]:
+            return self._movie_page(query)
+        if len(parts) == 2 and parts[0] == "movies":
+            movie = view.movies.get(parts[1])
+            if movie is None:
+                raise HttpError(404, f"Movie '{parts[1]}' not found.")
+            return self._json_body(movie_row(parts[1], movie))
+        if parts == ["search"]:
+            term = (query.get("q") or [""])[0]
+            limit = _int_param(query, "limit", self._page_size, 1, MAX_PAGE_SIZE)
+            fuzzy = (query.get("fuzzy") or ["0"])[0] not in ("0", "false", "")
+            titles = view.search.search(term, limit=limit, fuzzy=fuzzy)
+            return self._json_body([movie_row(title, view.movies[title]) for title in titles])
+        if parts == ["top"]:
+            n = _int_param(query, "n", 10, 1, MAX_PAGE_SIZE)
+            by = (query.get("by") or ["rating"])[0]
+            if by == "rating":
+                titles = [title for title, _ in view.ratings.top(n)]
+            elif by == "year":
+                titles = heapq.nsmallest(n, view.movies, key=lambda title: (-self._year(view.movies[title]), title))
+            else:
+                raise HttpError(400, "'by' must be 'rating' or 'year'.")
+            return self._json_body([movie_row(title, view.movies[title]) for title in titles])
+        if parts == ["stats"]:
+            stats = view.ratings.summary()
+            if stats is not None:
+                stats['best'] = movie_row(stats['best'][0], view.movies[stats['best'][0]])
+                stats['worst'] = movie_row(stats['worst'][0], view.movies[stats['worst'][0]])
+            return self._json_body(stats or {'count': 0})
+        raise HttpError(404, f"/{'/'.join(parts)} not found.")
+
+    @staticmethod
+    def _year(movie):
+        """The first year of a movie as a number, 0 if it has none."""
+        year = str(movie.get('year') or '')[:4]
+        return int(year) if year.isascii() and year.isdigit() else 0
+
+    def _movie_page(self, query):
+        """Streams one page of the library as a JSON object, a chunk of movies at a time."""
+        offset = _int_param(query, "offset", 0)
+        limit = _int_param(query, "limit", self._page_size, 1, MAX_PAGE_SIZE)
+        movies = self._view.movies
+        total = len(movies)
+        items = list(islice(movies.items(), offset, offset + limit))
+        following = offset + limit if offset + limit < total else None
+        head = json.dumps({'total': total, 'offset': offset, 'limit': limit, 'next_offset': following})
+
+        def chunks():
+            yield (head[:-1] + ', "movies": [').encode()
+            for start in range(0, len(items), 100):
+                rows = (json.dumps(movie_row(title, movie)) for title, movie in items[start:start + 100])
+                yield ((", " if start else "") + ", ".join(rows)).encode()
+            yield b"]}"
+        return chunks()
+
+    @staticmethod
+    def _json_body(value):
+        """Encodes a response body as JSON."""
+        return json.dumps(value).encode()
+
+    @staticmethod
+    def _json_request(body):
+        """Decodes a JSON request body into a dict."""
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            raise HttpError(400, "The request body must be JSON.")
+        if not isinstance(data, dict):
+            raise HttpError(400, "The request body must be a JSON object.")
+        return data
+
+    @staticmethod
+    def _rating(value):
+        """Validates a rating from a request."""
+        try:
+            rating = float(value)
+        except (TypeError, ValueError):
+            raise HttpError(400, "'rating' must be a number.")
+        if not 0 <= rating <= 10:
+            raise HttpError(400, "'rating' must be between 0 and 10.")
+        return rating
+
+    async def _write(self, function, *args):
+        """Runs a blocking storage call in a worker thread."""
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    async def _add(self, data):
+        """Adds a movie from a request body, looking it up on OMDb if only the title is given."""
+        title = str(data.get('title') or '').strip()
+        if not title:
+            raise HttpError(400, "'title' is required.")
+        if set(data) == {'title'} and self._omdb is not None:
+            try:
+                data = await self._write(self._omdb.fetch, title)
+            except OmdbError as e:
+                raise HttpError(502, f"OMDb API request failed with status code {e.status_code}.")
+            except OmdbRequestError as e:
+                raise HttpError(502, f"Error fetching data from OMDb API: {e}")
+            if data is None:
+                raise HttpError(404, f"Movie '{title}' not found on OMDb.")
+            title = data['title']
+        movie = {
+            'title': title,
+            'year': str(data.get('year') or ''),
+            'rating': self._rating(data.get('rating') or 0.0),
+            'poster': data.get('poster') or '',
+            'imdb_link': data.get('imdb_link') or '',
+            'country_code': data.get('country_code'),
+            'notes': data.get('notes'),
+        }
+        async with self._write_lock:
+            if title in self._view.movies:
+                raise HttpError(409, f"Movie '{title}' already exists.")
+            await self._write(self._storage.add_many, [movie])
+            self._view.add(title, Movie.from_dict(movie))
+        return movie_row(title, self._view.movies[title])
+
+    async def _update(self, title, data):
+        """Changes the rating and notes of a movie from a request body."""
+        rating = self._rating(data.get('rating'))
+        notes = data.get('notes')
+        async with self._write_lock:
+            if title not in self._view.movies:
+                raise HttpError(404, f"Movie '{title}' not found.")
+            await self._write(self._storage.update_movie, title, rating, notes)
+            self._view.update(title, rating, notes)
+        return movie_row(title, self._view.movies[title])
+
+    async def _delete(self, title):
+        """Deletes a movie."""
+        async with self._write_lock:
+            if title not in self._view.movies:
+                raise HttpError(404, f"Movie '{title}' not found.")
+            await self._write(self._storage.delete_movie, title)
+            self._view.delete(title)
+
+    async def _send(self, writer, status, content, headers=(), keep_alive=False):
+        """Writes a response; bytes get a Content-Length, a chunk iterator is sent chunked."""
+        lines = [f"HTTP/1.1 {status} {REASONS[status]}", f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if not any(name == "Content-Type" for name, _ in headers):
+            lines.append("Content-Type: application/json")
+        lines += [f"{name}: {value}" for name, value in headers]
+        if content is None or isinstance(content, bytes):
+            content = content or b""
+            if status not in (204, 304):
+                lines.append(f"Content-Length: {len(content)}")
+            writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + content)
+        else:
+            lines.append("Transfer-Encoding: chunked")
+            writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+            for chunk in content:
+                if chunk:
+                    writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                    await writer.drain()
+            writer.write(b"0\r\n\r\n")
+        await writer.drain()
@@ -0,0 +1,89 @@
+"""
+Load-test the HTTP API server and report requests per second and latency percentiles.
+
+Clients keep their connection open and send requests back to back for the given time.
+With --revalidate they send the ETag of their previous response in If-None-Match, as a
+caching client would, so unchanged responses come back as 304.
+
+Usage: python -m movie_app_project.benchmarks.api_load [--url URL] [--path /stats] [--concurrency 50]
+       [--duration 10] [--revalidate]
+"""
+import argparse
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+
+async def _read_response(reader):
+    """Reads one response and returns its status code and ETag."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name:
+            headers[name.strip().lower()] = value.strip()
+    if headers.get("transfer-encoding") == "chunked":
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    return status, headers.get("etag")
+
+
+async def _client(host, port, path, deadline, revalidate, latencies, statuses):
+    """Sends requests on one keep-alive connection until the deadline."""
+    reader, writer = await asyncio.open_connection(host, port)
+    etag = None
+    try:
+        while time.perf_counter() < deadline:
+            request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\n"
+            if revalidate and etag:
+                request += f"If-None-Match: {etag}\r\n"
+            start = time.perf_counter()
+            writer.write((request + "\r\n").encode("latin-1"))
+            status, etag = await _read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run(url, path, concurrency, duration, revalidate):
+    """Runs the load test and returns (requests, seconds, latencies, statuses)."""
+    parts = urlsplit(url)
+    latencies, statuses = [], {}
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(_client(parts.hostname, parts.port or 80, path, deadline, revalidate, latencies, statuses)
+                           for _ in range(concurrency)))
+    return len(latencies), time.perf_counter() - start, sorted(latencies), statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP API load test")
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='Address of the running server.')
+    parser.add_argument('--path', default='/stats', help='Request path, e.g. "/movies?limit=100" or "/search?q=the".')
+    parser.add_argument('--concurrency', type=int, default=50, help='Number of simultaneous connections.')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run.')
+    parser.add_argument('--revalidate', action='store_true', help='Send If-None-Match with the last ETag.')
+    args = parser.parse_args()
+
+    requests, seconds, latencies, statuses = asyncio.run(
+        run(args.url, args.path, args.concurrency, args.duration, args.revalidate))
+    if not requests:
+        print("No requests completed.")
+        return
+    print(f"{requests} requests in {seconds:.1f}s: {requests / seconds:.0f} requests/sec")
+    for percentile in (50, 90, 99):
+        latency = latencies[min(len(latencies) - 1, len(latencies) * percentile // 100)]
+        print(f"  p{percentile} latency: {latency * 1000:.2f} ms")
+    print("  status codes: " + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items())))
+
+
+if __name__ == "__main__":
+    main()
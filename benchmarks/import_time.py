@@ -0,0 +1,94 @@
+"""
+Check that starting the app stays within an import-time budget.
+
+Runs `python -X importtime -c "import movie_app_project.main"` a few times in fresh
+interpreters and takes the fastest run. The check fails if importing main takes longer
+than the budget or if startup loads a module that should only be imported on demand:
+the HTTP stack, NumPy, SQLite, pycountry, asyncio, multiprocessing or http.server.
+tests/test_import_time.py runs the same checks under pytest.
+
+Usage: python -m movie_app_project.benchmarks.import_time [--budget-ms 30] [--runs 5] [--top 10]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ENTRY_MODULE = 'movie_app_project.main'
+BUDGET_MS = 30.0
+DEFERRED_MODULES = ('requests', 'urllib3', 'numpy', 'sqlite3', 'pycountry', 'asyncio', 'multiprocessing',
+                    'http.server', 'movie_app_project.stats_engine', 'movie_app_project.api_server')
+# The directory holding the movie_app_project package, so fresh interpreters can import it from anywhere
+PACKAGE_PARENT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _run_python(*args):
+    """Runs a fresh interpreter that can import the package and returns the completed process."""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, (PACKAGE_PARENT, env.get('PYTHONPATH'))))
+    return subprocess.run([sys.executable, *args], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                          check=True, env=env)
+
+
+def loaded_deferred_modules(module):
+    """Returns the DEFERRED_MODULES found in sys.modules after importing a module in a fresh interpreter."""
+    completed = _run_python('-c', f"import sys, {module}; print('\\n'.join(sys.modules))")
+    loaded = set(completed.stdout.split())
+    return sorted(name for name in DEFERRED_MODULES if name in loaded)
+
+
+def measure_imports(module):
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    Returns:
+        dict: Name -> (self microseconds, cumulative microseconds) of the module and of
+            everything its import loaded, leaving out what the interpreter loads at startup.
+    """
+    completed = _run_python('-X', 'importtime', '-c', f"import {module}")
+    imports = {}
+    for line in completed.stderr.splitlines():
+        fields = line[len('import time:'):].split('|')
+        if not line.startswith('import time:') or len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        imports[name.strip()] = (int(fields[0]), int(fields[1]))
+        # Nested imports are listed before the top-level import that loaded them
+        if name.startswith(' ' * 2):
+            continue
+        if name.strip() == module:
+            return imports
+        imports = {}
+    raise RuntimeError(f"{module} was not imported")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=BUDGET_MS, help=f"Allowed time to import {ENTRY_MODULE}.")
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to start; the fastest counts.')
+    parser.add_argument('--top', type=int, default=10, help='Number of slowest imports to list.')
+    args = parser.parse_args()
+
+    runs = [measure_imports(ENTRY_MODULE) for _ in range(args.runs)]
+    best = min(runs, key=lambda imports: imports[ENTRY_MODULE][1])
+    total_ms = best[ENTRY_MODULE][1] / 1000
+
+    print(f"Importing {ENTRY_MODULE} took {total_ms:.1f} ms (budget {args.budget_ms:.1f} ms), "
+          f"best of {args.runs} runs.")
+    print("Slowest imports by their own time:")
+    for name, (own, cumulative) in sorted(best.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"  {own / 1000:7.2f} ms own {cumulative / 1000:7.2f} ms total  {name}")
+
+    failed = False
+    loaded = loaded_deferred_modules(ENTRY_MODULE)
+    if loaded:
+        failed = True
+        print(f"Loaded at startup but should only be imported on demand: {', '.join(loaded)}")
+    if total_ms > args.budget_ms:
+        failed = True
+        print(f"Over budget by {total_ms - args.budget_ms:.1f} ms.")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""
+Compare the memory footprint of a library held as details dicts and as Movie records.
+
+Both libraries are parsed from the same JSON text, the way StorageJson reads them, and
+the memory still allocated afterwards is measured with tracemalloc.
+
+Usage: python -m movie_app_project.benchmarks.movie_memory [--movies N]
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+from movie_app_project.movie import Movie
+from movie_app_project.benchmarks.synthetic import synthetic_library
+
+
+def measure(load, text):
+    """Returns the bytes still allocated after load(text) built the library."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    library = load(text)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del library
+    return after - before
+
+
+def as_dicts(text):
+    """Library as the storages used to return it: a dict of details dicts."""
+    return json.loads(text)
+
+
+def as_movies(text):
+    """Library as a dict of Movie records."""
+    return {title: Movie.from_dict(details) for title, details in json.loads(text).items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Movie record memory benchmark")
+    parser.add_argument('--movies', type=int, default=100000, help='Number of synthetic movies.')
+    args = parser.parse_args()
+
+    text = json.dumps(synthetic_library(args.movies))
+    results = {}
+    for name, load in (("dicts", as_dicts), ("Movie records", as_movies)):
+        results[name] = measure(load, text)
+        print(f"{name:>14}: {results[name] / 2 ** 20:8.1f} MiB, {results[name] / args.movies:6.0f} bytes per movie")
+    saved = 1 - results["Movie records"] / results["dicts"]
+    print(f"Movie records use {saved:.0%} less memory than dicts for {args.movies} movies.")
+
+
+if __name__ == "__main__":
+    main()
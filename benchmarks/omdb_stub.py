@@ -0,0 +1,80 @@
+"""
+A local stand-in for the OMDb API, so benchmarks measure the app and not the network
+and tests can make lookups fail on purpose.
+"""
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+NOT_FOUND = {'Response': 'False', 'Error': 'Movie not found!'}
+
+
+class _OmdbHandler(BaseHTTPRequestHandler):
+    """
+    Answers every title or IMDb ID lookup with the same made-up movie, unless the server
+    has scripted answers left for the looked up title or ID.
+    """
+
+    def do_GET(self):
+        query = parse_qs(urlsplit(self.path).query)
+        title = (query.get('t') or query.get('i') or [''])[0]
+        server = self.server
+        with server.lock:
+            server.requests.append((time.monotonic(), title))
+            scripted = server.responses.get(title)
+            answer = scripted.pop(0) if scripted else None
+
+        if answer == 'timeout':
+            time.sleep(server.timeout_delay)
+            answer = None
+        if isinstance(answer, int):
+            self.send_response(answer)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = json.dumps(answer or {
+            'Response': 'True',
+            'Title': title,
+            'Year': '2001',
+            'imdbRating': '7.1',
+            'Poster': 'https://m.media-amazon.com/images/M/stub._V1_SX300.jpg',
+            'imdbID': 'tt0000001',
+            'Country': 'United States, United Kingdom',
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except ConnectionError:  # the client gave up waiting for a delayed answer
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_omdb_stub(responses=None, timeout_delay=1.0):
+    """
+    Start the stub on a free local port in a daemon thread.
+
+    Args:
+        responses (dict): Title or IMDb ID -> answers to give to its next lookups in turn.
+            An answer is an HTTP status code, a response body dict (e.g. NOT_FOUND), or
+            'timeout' to answer only after timeout_delay seconds. Once they are used up
+            the made-up movie is returned.
+        timeout_delay (float): Seconds a 'timeout' answer is held back.
+
+    Returns:
+        tuple: The server and its base URL. `server.requests` lists the (monotonic time,
+            title or ID) of every request received.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _OmdbHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.responses = {key: list(answers) for key, answers in (responses or {}).items()}
+    server.timeout_delay = timeout_delay
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
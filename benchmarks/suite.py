@@ -0,0 +1,314 @@
+"""
+Time the library operations on every storage backend at several library sizes.
+
+For each backend and size a synthetic library is written to a temporary directory and
+a fresh worker process times list_movies, get, add_movie, update_movie, delete_movie,
+search, sort (top_n), stats and website generation on it, plus the menu commands that
+add, search, sort and show statistics through MovieApp. The menu search is timed both as
+a scan and through the title index main.py builds by default. OMDb lookups go to a local stub.
+
+Every operation is reported with its best and median wall time over --repeat runs, the
+peak memory it allocated (a separate tracemalloc run, skipped with --no-alloc) and the
+peak RSS of the worker so far. Running each library in its own process keeps the peak
+RSS of one backend from hiding the next one.
+
+The results can be saved as JSON with --output and compared against an earlier run with
+--compare; operations whose median got slower than --threshold make the exit status 1.
+
+Usage: python -m movie_app_project.benchmarks.suite [--sizes 1000,100000,1000000]
+       [--backends json,csv,journal,sqlite,mvb] [--repeat 3] [--no-alloc]
+       [--output results.json] [--compare baseline.json] [--threshold 0.2]
+"""
+import argparse
+import builtins
+import contextlib
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from movie_app_project.benchmarks.synthetic import synthetic_library
+from movie_app_project.benchmarks.omdb_stub import start_omdb_stub
+from movie_app_project.movie_app import MovieApp
+from movie_app_project.omdb import OmdbClient
+from movie_app_project.search_index import SearchIndex
+from movie_app_project.storage_binary import StorageBinary
+from movie_app_project.storage_csv import StorageCsv
+from movie_app_project.storage_journal import StorageJournal
+from movie_app_project.storage_json import StorageJson
+from movie_app_project.storage_sqlite import StorageSqlite
+from movie_app_project.website import WebsiteGenerator
+
+try:
+    import resource
+except ImportError:  # not available on Windows, peak RSS is then not reported
+    resource = None
+
+BACKENDS = {
+    'json': ('library.json', StorageJson),
+    'csv': ('library.csv', StorageCsv),
+    'journal': ('library.journal', StorageJournal),
+    'sqlite': ('library.sqlite', StorageSqlite),
+    'mvb': ('library.mvb', StorageBinary),
+}
+SEARCH_TERM = 'night king'
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'index_template.html')
+
+
+def peak_rss():
+    """Returns the peak resident set size of this process in bytes, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+@contextlib.contextmanager
+def _answers(*replies):
+    """Feeds replies to input() and discards everything printed, for timing menu commands."""
+    replies = iter(replies)
+    original = builtins.input
+    builtins.input = lambda prompt='': next(replies, '')
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            yield
+    finally:
+        builtins.input = original
+
+
+class Worker:
+    """
+    Times the operations on one seeded library.
+
+    Every operation is a callable taking the run number, so operations that change the
+    library can use a different title on every run and leave it as they found it.
+    """
+
+    def __init__(self, backend, path, movies, omdb, work_dir):
+        """
+        Initialize the Worker.
+
+        Args:
+            backend (str): Key of the backend in BACKENDS.
+            path (str): The seeded library file.
+            movies (dict): The seeded movies, whose titles get and update use.
+            omdb (OmdbClient): Client pointed at the OMDb stub.
+            work_dir (str): Directory for the generated website.
+        """
+        self.backend = backend
+        self.path = path
+        self.titles = list(movies)
+        self.omdb = omdb
+        self.work_dir = work_dir
+        self.storage = None
+        self.search_index = None
+
+    def _open(self):
+        """Opens the library with the backend under test."""
+        self.storage = BACKENDS[self.backend][1](self.path)
+        return self.storage
+
+    def _app(self, indexed=False):
+        """Returns a MovieApp on the library that looks movies up on the OMDb stub, searching the title index if asked."""
+        return MovieApp(self.storage, omdb=self.omdb, search_index=self.search_index if indexed else None)
+
+    def _build_search_index(self):
+        """Builds the title index from the library, as main.py does on startup without a saved index."""
+        self.search_index = SearchIndex(self.path + '.search', source_paths=[self.path, self.path + '.log'])
+        self.search_index.sync(self.storage.list_movies)
+
+    def _existing(self, run):
+        """Returns a title of the library that differs between runs."""
+        return self.titles[(run * 7919) % len(self.titles)]
+
+    def operations(self):
+        """Returns the (name, callable) pairs to time, in the order they run."""
+        storage = lambda: self.storage
+        return [
+            ('open', lambda run: self._open()),
+            ('list_movies', lambda run: sum(1 for _ in storage().list_movies().items())),
+            ('get', lambda run: storage().get(self._existing(run))),
+            ('add_movie', lambda run: storage().add_movie(
+                f"Benchmark Movie {run}", '2001', 7.5, 'poster.jpg', 'https://www.imdb.com/title/tt0000001/', 'US')),
+            ('update_movie', lambda run: storage().update_movie(f"Benchmark Movie {run}", 8.0, 'Benchmark note')),
+            ('delete_movie', lambda run: storage().delete_movie(f"Benchmark Movie {run}")),
+            ('search', lambda run: storage().search(SEARCH_TERM)),
+            ('sort', lambda run: storage().top_n('rating')),
+            ('top_10', lambda run: storage().top_n('rating', 10)),
+            ('stats', lambda run: storage().aggregate_stats()),
+            ('website', lambda run: WebsiteGenerator(TEMPLATE_PATH).generate(
+                storage().list_movies(), os.path.join(self.work_dir, 'site.html'))),
+            ('app_add_movie', self._app_add_movie),
+            ('app_search', lambda run: self._menu('_command_search_movie', SEARCH_TERM)),
+            ('search_index', lambda run: self._build_search_index()),
+            ('app_search_indexed', lambda run: self._menu('_command_search_movie', SEARCH_TERM, indexed=True)),
+            ('app_sort', lambda run: self._menu('_command_movies_sorted_by_rating', 'q')),
+            ('app_stats', lambda run: self._menu('_command_movie_stats')),
+            ('flush', lambda run: storage().flush()),
+        ]
+
+    def _menu(self, command, *replies, indexed=False):
+        """Runs a menu command of a fresh MovieApp, as the menu does after startup."""
+        with _answers(*replies):
+            getattr(self._app(indexed), command)()
+
+    def _app_add_movie(self, run):
+        """Adds a movie through the menu, looked up on the OMDb stub, and removes it again."""
+        title = f"Stub Movie {run}"
+        self._menu('_command_add_movie', title)
+        self.storage.delete_movie(title)
+
+    def run(self, repeat, measure_allocations):
+        """Times every operation and returns one result dict per operation."""
+        results = []
+        for name, operation in self.operations():
+            times = []
+            for run in range(repeat):
+                start = time.perf_counter()
+                operation(run)
+                times.append(time.perf_counter() - start)
+            allocated = None
+            if measure_allocations:
+                tracemalloc.start()
+                try:
+                    operation(repeat)
+                    allocated = tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+            results.append({
+                'operation': name,
+                'repeat': repeat,
+                'best_seconds': min(times),
+                'median_seconds': statistics.median(times),
+                'allocated_peak_bytes': allocated,
+                'rss_peak_bytes': peak_rss(),
+            })
+        return results
+
+
+def run_worker(backend, size, repeat, measure_allocations):
+    """Seeds one library, times it and returns the results of every operation."""
+    server, url = start_omdb_stub()
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            path = os.path.join(work_dir, BACKENDS[backend][0])
+            movies = synthetic_library(size)
+            seeding = BACKENDS[backend][1](path)
+            seeding.add_many({'title': title, **details} for title, details in movies.items())
+            seeding.flush()
+            del seeding
+            worker = Worker(backend, path, movies, OmdbClient(base_url=url), work_dir)
+            del movies
+            results = worker.run(repeat, measure_allocations)
+            worker.storage.flush()
+    finally:
+        server.shutdown()
+    for result in results:
+        result.update(backend=backend, size=size)
+    return results
+
+
+def _spawn(backend, size, repeat, measure_allocations):
+    """Runs one worker in a child process and returns its results."""
+    command = [sys.executable, '-m', __spec__.name, '--worker', backend, str(size), '--repeat', str(repeat)]
+    if not measure_allocations:
+        command.append('--no-alloc')
+    completed = subprocess.run(command, stdout=subprocess.PIPE, text=True)
+    if completed.returncode != 0:
+        print(f"{backend} with {size} movies failed (exit status {completed.returncode}).", file=sys.stderr)
+        return []
+    return json.loads(completed.stdout)
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare median times with an earlier run.
+
+    Args:
+        results (list): Results of this run.
+        baseline (list): Results of the earlier run.
+        threshold (float): Allowed slowdown, e.g. 0.2 for 20%.
+
+    Returns:
+        list: (result, baseline median) pairs of the operations that got slower than allowed.
+    """
+    earlier = {(r['backend'], r['size'], r['operation']): r['median_seconds'] for r in baseline}
+    regressions = []
+    for result in results:
+        before = earlier.get((result['backend'], result['size'], result['operation']))
+        # Ignore sub-millisecond operations, their timings are mostly noise
+        if before is not None and result['median_seconds'] > max(before * (1 + threshold), before + 0.001):
+            regressions.append((result, before))
+    return regressions
+
+
+def _format_bytes(value):
+    """Formats a byte count in MiB, or '-' if unknown."""
+    return '-' if value is None else f"{value / 2 ** 20:.1f} MiB"
+
+
+def print_table(results):
+    """Prints the results as a table."""
+    print(f"{'backend':<8} {'size':>8} {'operation':<18} {'best':>10} {'median':>10} {'allocated':>12} {'peak RSS':>12}")
+    for r in results:
+        print(f"{r['backend']:<8} {r['size']:>8} {r['operation']:<18} {r['best_seconds'] * 1000:>8.2f}ms "
+              f"{r['median_seconds'] * 1000:>8.2f}ms {_format_bytes(r['allocated_peak_bytes']):>12} "
+              f"{_format_bytes(r['rss_peak_bytes']):>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='1000,100000,1000000', help='Comma separated library sizes.')
+    parser.add_argument('--backends', default=','.join(BACKENDS), help='Comma separated backends to run.')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per operation.')
+    parser.add_argument('--no-alloc', action='store_true', help='Skip the tracemalloc run of every operation.')
+    parser.add_argument('--output', help='Write the results to this JSON file.')
+    parser.add_argument('--compare', metavar='BASELINE', help='JSON results of an earlier run to compare with.')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed slowdown against the baseline.')
+    parser.add_argument('--worker', nargs=2, metavar=('BACKEND', 'SIZE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        backend, size = args.worker
+        json.dump(run_worker(backend, int(size), args.repeat, not args.no_alloc), sys.stdout)
+        return 0
+
+    backends = args.backends.split(',')
+    unknown = [backend for backend in backends if backend not in BACKENDS]
+    if unknown:
+        parser.error(f"unknown backends: {', '.join(unknown)}")
+    results = []
+    for size in (int(size) for size in args.sizes.split(',')):
+        for backend in backends:
+            print(f"Running {backend} with {size} movies...", file=sys.stderr)
+            results += _spawn(backend, size, args.repeat, not args.no_alloc)
+    print_table(results)
+
+    if args.output:
+        report = {
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'results': results,
+        }
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file)['results'], args.threshold)
+        for result, before in regressions:
+            print(f"Regression: {result['backend']} {result['size']} {result['operation']} "
+                  f"{before * 1000:.2f}ms -> {result['median_seconds'] * 1000:.2f}ms", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
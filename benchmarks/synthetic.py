@@ -0,0 +1,33 @@
+"""
+Synthetic movie libraries for the benchmarks.
+"""
+import random
+
+COUNTRIES = ('US', 'GB', 'FR', 'DE', 'IT', 'JP', 'IN', 'CA', 'ES', 'KR')
+WORDS = ('dark', 'night', 'love', 'story', 'last', 'city', 'man', 'war', 'house', 'dead', 'girl', 'blood',
+         'king', 'time', 'life', 'return', 'secret', 'world', 'game', 'star', 'day', 'home', 'black', 'fire')
+
+
+def synthetic_library(count, seed=0):
+    """
+    Returns a dict of count movies shaped like the ones the app stores.
+
+    Titles are a few common words plus a number, so they are unique but still share
+    words for searches. Every tenth movie has notes.
+    """
+    rng = random.Random(seed)
+    movies = {}
+    for i in range(count):
+        imdb_id = f"tt{i:07d}"
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3))).title() + f" {i}"
+        details = {
+            'year': str(rng.randint(1920, 2024)),
+            'rating': round(rng.uniform(1.0, 10.0), 1),
+            'poster': f"https://m.media-amazon.com/images/M/{imdb_id}._V1_SX300.jpg",
+            'imdb_link': f"https://www.imdb.com/title/{imdb_id}/",
+            'country_code': rng.choice(COUNTRIES),
+        }
+        if i % 10 == 0:
+            details['notes'] = f"Note {i}"
+        movies[title] = details
+    return movies
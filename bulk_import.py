@@ -0,0 +1,126 @@
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from movie_app_project.omdb import OmdbError, OmdbRequestError
+
+IMDB_ID_PATTERN = re.compile(r'^tt\d+$')
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter that spaces calls evenly at a maximum rate per second.
+    """
+
+    def __init__(self, rate):
+        """
+        Initialize the RateLimiter instance.
+
+        Args:
+            rate (float): Maximum number of calls per second. None or 0 disables limiting.
+        """
+        self._interval = 1.0 / rate if rate else 0.0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until the caller may make its next call."""
+        if not self._interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def read_entries(file_path):
+    """
+    Reads a bulk import file with one title or IMDb ID per line.
+
+    Blank lines and lines starting with '#' are skipped.
+    """
+    with open(file_path, "r", encoding="utf-8") as file:
+        return [line.strip() for line in file if line.strip() and not line.lstrip().startswith('#')]
+
+
+class BulkImporter:
+    """
+    Imports many movies at once by fetching OMDb data concurrently.
+
+    Lookups run on a bounded thread pool behind a shared rate limiter, and failed
+    requests are retried with exponential backoff. All new movies are committed with a
+    single add_many() call, so the library is written once per import.
+    """
+
+    def __init__(self, storage, omdb, workers=8, rate_limit=10.0, retries=3, backoff=0.5):
+        """
+        Initialize the BulkImporter instance.
+
+        Args:
+            storage (IStorage): The storage the movies are added to.
+            omdb (OmdbClient): The client used to look up movies.
+            workers (int): Number of concurrent lookups.
+            rate_limit (float): Maximum number of requests per second.
+            retries (int): Extra attempts for a lookup that failed with a transient error.
+            backoff (float): Seconds to wait before the first retry, doubled for every next one.
+        """
+        self._storage = storage
+        self._omdb = omdb
+        self._workers = workers
+        self._limiter = RateLimiter(rate_limit)
+        self._retries = retries
+        self._backoff = backoff
+
+    def _fetch(self, entry):
+        """Looks up a title or IMDb ID, retrying transient failures."""
+        query = {'imdb_id': entry} if IMDB_ID_PATTERN.match(entry) else {'title': entry}
+        for attempt in range(self._retries + 1):
+            try:
+                return self._omdb.fetch(before_request=self._limiter.acquire, **query)
+            except OmdbError as e:
+                if not e.retryable or attempt == self._retries:
+                    raise
+            except OmdbRequestError:
+                if attempt == self._retries:
+                    raise
+            time.sleep(self._backoff * 2 ** attempt)
+
+    def import_entries(self, entries):
+        """
+        Fetch and add the given titles or IMDb IDs.
+
+        Movies already in the storage, and duplicates within the batch, are skipped.
+
+        Returns:
+            dict: Lists of entries under 'added', 'skipped', 'not_found' and 'failed'.
+        """
+        result = {'added': [], 'skipped': [], 'not_found': [], 'failed': []}
+        new_movies = {}
+        existing = self._storage.list_movies()
+        with ThreadPoolExecutor(max_workers=self._workers) as executor:
+            futures = [(entry, executor.submit(self._fetch, entry)) for entry in entries]
+            for entry, future in futures:
+                try:
+                    movie_data = future.result()
+                except (OmdbError, OmdbRequestError) as e:
+                    print(f"Error fetching '{entry}' from OMDb API: {e}")
+                    result['failed'].append(entry)
+                    continue
+                if movie_data is None:
+                    result['not_found'].append(entry)
+                elif movie_data['title'] in new_movies or movie_data['title'] in existing:
+                    result['skipped'].append(entry)
+                else:
+                    new_movies[movie_data['title']] = movie_data
+                    result['added'].append(entry)
+        if new_movies:
+            self._storage.add_many(new_movies.values())
+        return result
+
+    def import_file(self, file_path):
+        """
+        Fetch and add every title or IMDb ID listed in a file.
+        """
+        return self.import_entries(read_entries(file_path))
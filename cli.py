@@ -0,0 +1,335 @@
+import argparse
+import csv
+import json
+import os
+import shlex
+import sys
+from movie_app_project.movie import movie_row
+from movie_app_project.omdb import OmdbError, OmdbRequestError
+from movie_app_project.website import WebsiteGenerator, PaginatedSiteGenerator
+
+
+class CommandError(Exception):
+    """
+    Raised by a subcommand that cannot do what was asked, e.g. for an unknown title.
+    """
+
+
+def add_subcommands(parser):
+    """
+    Add the non-interactive subcommands to an argument parser.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser to extend; `command` holds the chosen subcommand.
+
+    Returns:
+        list: The names of the subcommands.
+    """
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument('--format', choices=('text', 'json', 'csv'), default='text',
+                        help='Output format. Default is "text".')
+    subparsers = parser.add_subparsers(dest='command', metavar='command',
+                                       help='Run one command and exit instead of showing the menu.')
+
+    subparsers.add_parser('list', parents=[output], help='List all movies.')
+    subparsers.add_parser('stats', parents=[output], help='Show rating statistics.')
+
+    add = subparsers.add_parser('add', parents=[output], help='Look up a movie on OMDb and add it.')
+    add.add_argument('title')
+
+    update = subparsers.add_parser('update', parents=[output], help='Change the rating and notes of a movie.')
+    update.add_argument('title')
+    update.add_argument('rating', type=float)
+    update.add_argument('--notes', default=None)
+
+    delete = subparsers.add_parser('delete', parents=[output], help='Delete a movie.')
+    delete.add_argument('title')
+
+    search = subparsers.add_parser('search', parents=[output], help='Find movies by part of their title.')
+    search.add_argument('term')
+    search.add_argument('--limit', type=int, default=None)
+    search.add_argument('--fuzzy', action='store_true', help='Also return titles close to the term.')
+
+    sort = subparsers.add_parser('sort', parents=[output], help='List movies ordered by rating or year.')
+    sort.add_argument('--by', choices=('rating', 'year'), default='rating')
+    sort.add_argument('--limit', type=int, default=None)
+
+    generate = subparsers.add_parser('generate', parents=[output], help='Generate the website.')
+    generate.add_argument('--output', default=None,
+                          help='Page (or directory with --paginated) to write. Default is next to the app.')
+    generate.add_argument('--paginated', action='store_true',
+                          help='Write paginated pages with per-year and per-country indexes.')
+
+    import_ = subparsers.add_parser('import', parents=[output], help='Import titles or IMDb IDs listed in a file.')
+    import_.add_argument('file')
+
+    serve = subparsers.add_parser('serve', help='Serve the library as a JSON HTTP API until interrupted.')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8000)
+    serve.add_argument('--page-size', type=int, default=100, help='Movies per page when a request gives no limit.')
+
+    script = subparsers.add_parser('script', help='Run the commands listed in a file ("-" for stdin), one per line.')
+    script.add_argument('file')
+    script.add_argument('--keep-going', action='store_true', help='Run the remaining commands after a failure.')
+    return list(subparsers.choices)
+
+
+class CommandRunner:
+    """
+    Runs the subcommands against one opened storage and prints their results.
+
+    Results are printed as text lines like the menu's, or as JSON or CSV for scripts.
+    A script runs many commands in one process inside a single storage batch, so the
+    storage is opened and read once for the whole file instead of once per command.
+    """
+
+    def __init__(self, storage, omdb, importer=None, search_index=None, out=None, metrics=None):
+        """
+        Initialize the CommandRunner.
+
+        Args:
+            storage (IStorage): The storage the commands work on.
+            omdb (OmdbClient): The client used by 'add' to look up movies.
+            importer (BulkImporter): The importer used by 'import'.
+            search_index (SearchIndex): Title index used by 'search', kept current by the other commands.
+            out (file): Where results are written. Defaults to stdout.
+            metrics (Metrics): If given, the duration of every command is recorded, and 'serve'
+                also records request latencies and answers GET /metrics.
+        """
+        self._storage = storage
+        self._omdb = omdb
+        self._importer = importer
+        self._search_index = search_index
+        self._out = out or sys.stdout
+        self._metrics = metrics
+        self._parser = argparse.ArgumentParser(prog='script', add_help=False, exit_on_error=False)
+        add_subcommands(self._parser)
+
+    def run(self, args):
+        """
+        Run the subcommand selected in parsed arguments.
+
+        Returns:
+            int: The exit status, 0 on success.
+        """
+        try:
+            if args.command == 'script':
+                return self._run_script(args.file, args.keep_going)
+            if args.command == 'serve':
+                return self._serve(args)
+            self._dispatch(args)
+            return 0
+        except CommandError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        finally:
+            self._storage.flush()
+            if self._search_index is not None:
+                self._search_index.save()
+
+    def _dispatch(self, args):
+        """Runs a single parsed command."""
+        handler = getattr(self, f"_command_{args.command}")
+        if self._search_index is not None:
+            # Picks up changes another writer made since the index was loaded or last checked
+            self._search_index.sync(self._storage.list_movies)
+        if self._metrics is not None:
+            handler = self._metrics.timed(handler, 'app_command_seconds', command=args.command)
+        result = handler(args)
+        if result is not None:
+            self._write(result, args.format)
+
+    def _run_script(self, path, keep_going):
+        """Runs every command of a script file inside one storage batch."""
+        try:
+            file = sys.stdin if path == '-' else open(path, "r")
+        except OSError as e:
+            raise CommandError(f"Cannot read script '{path}': {e}") from e
+        failures = 0
+        with file, self._storage.batch():
+            for number, line in enumerate(file, 1):
+                words = shlex.split(line, comments=True)
+                if not words:
+                    continue
+                try:
+                    args = self._parser.parse_args(words)
+                    if args.command in (None, 'script', 'serve'):
+                        raise CommandError("expected a command other than 'script' or 'serve'")
+                    self._dispatch(args)
+                except (CommandError, argparse.ArgumentError) as e:
+                    failures += 1
+                    print(f"Error on line {number}: {e}", file=sys.stderr)
+                except SystemExit:
+                    # argparse already printed the usage error of the line
+                    failures += 1
+                    print(f"Error on line {number}: invalid command '{line.strip()}'", file=sys.stderr)
+                if failures and not keep_going:
+                    break
+        if self._search_index is not None:
+            # The batch wrote the changes of every command at once, which the index already follows
+            self._search_index.caught_up()
+        return 1 if failures else 0
+
+    def _serve(self, args):
+        """Runs the HTTP API server until interrupted."""
+        # asyncio and the server are only needed here, so other commands start without them
+        import asyncio
+        from movie_app_project.api_server import ApiServer
+
+        server = ApiServer(self._storage, host=args.host, port=args.port, page_size=args.page_size, omdb=self._omdb,
+                           metrics=self._metrics)
+        print(f"Serving the library on http://{args.host}:{args.port}/ (Ctrl+C to stop)")
+        try:
+            asyncio.run(server.serve_forever())
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            pass
+        return 0
+
+    def _write(self, result, output_format):
+        """Prints a result as text, JSON or CSV."""
+        rows, lines = result
+        if output_format == 'json':
+            json.dump(rows, self._out, indent=2)
+            self._out.write("\n")
+        elif output_format == 'csv':
+            rows = rows if isinstance(rows, list) else [rows]
+            if rows:
+                writer = csv.DictWriter(self._out, fieldnames=list(rows[0]), lineterminator="\n")
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            for line in lines:
+                print(line, file=self._out)
+
+    @staticmethod
+    def _movie_lines(rows):
+        """Text lines for a list of movie rows, as the menu prints them."""
+        for row in rows:
+            line = f"{row['title']} ({row['year']}): {row['rating']}"
+            yield f"{line} - Note: {row['notes']}" if row['notes'] else line
+
+    def _require(self, title):
+        """Returns the details of a movie, or raises CommandError if it is not in the library."""
+        details = self._storage.get(title)
+        if details is None:
+            raise CommandError(f"Movie '{title}' not found.")
+        return details
+
+    def _command_list(self, args):
+        """List all movies."""
+        rows = [movie_row(title, details) for title, details in self._storage.list_movies().items()]
+        return rows, self._movie_lines(rows)
+
+    def _command_stats(self, args):
+        """Rating statistics of the library."""
+        stats = self._storage.aggregate_stats()
+        if not stats:
+            return {'count': 0}, ["No movies in the storage."]
+        row = {
+            'count': stats['count'],
+            'average': stats['average'],
+            'median': stats['median'],
+            'best': stats['best'][0],
+            'best_rating': stats['best'][1]['rating'],
+            'worst': stats['worst'][0],
+            'worst_rating': stats['worst'][1]['rating'],
+        }
+        lines = [
+            f"Movies: {row['count']}",
+            f"Average rating: {row['average']:.2f}",
+            f"Median rating: {row['median']:.2f}",
+            f"Best movie: {row['best']}, Rating: {row['best_rating']}",
+            f"Worst movie: {row['worst']}, Rating: {row['worst_rating']}",
+        ]
+        return row, lines
+
+    def _command_add(self, args):
+        """Look up a movie on OMDb and add it."""
+        if self._storage.get(args.title) is not None:
+            raise CommandError(f"Movie '{args.title}' already exists.")
+        try:
+            movie_data = self._omdb.fetch(args.title)
+        except OmdbError as e:
+            raise CommandError(f"OMDb API request failed with status code {e.status_code}.") from e
+        except OmdbRequestError as e:
+            raise CommandError(f"Error fetching data from OMDb API: {e}") from e
+        if movie_data is None:
+            raise CommandError(f"Movie '{args.title}' not found on OMDb.")
+        self._storage.add_many([movie_data])
+        if self._search_index is not None:
+            self._search_index.add(movie_data['title'], movie_data)
+            self._search_index.caught_up()
+        row = movie_row(movie_data['title'], movie_data)
+        return row, [f"Movie '{row['title']}' added."]
+
+    def _command_update(self, args):
+        """Change the rating and, if given, the notes of a movie."""
+        self._require(args.title)
+        if not 0 <= args.rating <= 10:
+            raise CommandError("The rating must be between 0 and 10.")
+        self._storage.update_movie(args.title, args.rating, args.notes)
+        details = self._require(args.title)
+        if self._search_index is not None:
+            if args.notes is not None:
+                self._search_index.add(args.title, details)
+            self._search_index.caught_up()
+        return movie_row(args.title, details), [f"Movie '{args.title}' updated."]
+
+    def _command_delete(self, args):
+        """Delete a movie."""
+        details = self._require(args.title)
+        self._storage.delete_movie(args.title)
+        if self._search_index is not None:
+            self._search_index.remove(args.title)
+            self._search_index.caught_up()
+        return movie_row(args.title, details), [f"Movie '{args.title}' deleted."]
+
+    def _command_search(self, args):
+        """Find movies by part of their title."""
+        if self._search_index is None:
+            found = self._storage.search(args.term, args.limit)
+        else:
+            titles = self._search_index.search(args.term, limit=args.limit, fuzzy=args.fuzzy)
+            found = self._storage.get_many(titles)
+        rows = [movie_row(title, details) for title, details in found]
+        return rows, self._movie_lines(rows) if rows else ["No matching movies found."]
+
+    def _command_sort(self, args):
+        """Movies ordered by rating or year, highest first."""
+        rows = [movie_row(title, details) for title, details in self._storage.top_n(args.by, args.limit)]
+        return rows, self._movie_lines(rows)
+
+    def _command_generate(self, args):
+        """Write the single page or the paginated website."""
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        movies = self._storage.list_movies()
+        try:
+            if args.paginated:
+                output = args.output or os.path.join(current_dir, '../my_movie_app')
+                website = PaginatedSiteGenerator(os.path.join(current_dir, 'page_template.html'),
+                                                 os.path.join(current_dir, 'style.css'),
+                                                 by_year=True, by_country=True)
+                written = website.generate(movies, output)
+            else:
+                output = args.output or os.path.join(current_dir, '../my_movie_app.html')
+                WebsiteGenerator(os.path.join(current_dir, 'index_template.html')).generate(movies, output)
+                written = 1
+        except OSError as e:
+            raise CommandError(f"Error generating website: {e}") from e
+        row = {'output': os.path.abspath(output), 'pages_written': written, 'movies': len(movies)}
+        return row, [f"Website written to '{row['output']}' ({written} pages updated)."]
+
+    def _command_import(self, args):
+        """Import the titles or IMDb IDs listed in a file."""
+        try:
+            result = self._importer.import_file(args.file)
+        except OSError as e:
+            raise CommandError(f"Cannot read '{args.file}': {e}") from e
+        if self._search_index is not None and result['added']:
+            for title, details in self._storage.list_movies().items():
+                if title not in self._search_index:
+                    self._search_index.add(title, details)
+            self._search_index.caught_up()
+        row = {key: len(entries) for key, entries in result.items()}
+        return row, [f"Imported {row['added']} movies, skipped {row['skipped']} already in the library, "
+                     f"{row['not_found']} not found, {row['failed']} failed."]
@@ -0,0 +1,100 @@
+"""
+Country name to ISO 3166 alpha-2 code lookup for the countries OMDb reports.
+
+The names are looked up in a precomputed table, countries.json, which is loaded on the
+first lookup. pycountry is only needed to rebuild the table after a pycountry update:
+
+    python -m movie_app_project.countries
+"""
+import json
+import os
+import sys
+from functools import lru_cache
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'countries.json')
+
+# Spellings OMDb uses that pycountry does not know
+ALIASES = {
+    'UK': 'GB',
+    'Russia': 'RU',
+    'Turkey': 'TR',
+    'Ivory Coast': 'CI',
+    'Cape Verde': 'CV',
+    'Swaziland': 'SZ',
+    'Burma': 'MM',
+    'Macedonia': 'MK',
+    'Palestine': 'PS',
+    'Occupied Palestinian Territory': 'PS',
+    'Vatican': 'VA',
+    'Brunei': 'BN',
+    'Micronesia': 'FM',
+    'Korea': 'KR',
+    'The Democratic Republic Of Congo': 'CD',
+    'Republic of the Congo': 'CG',
+    'Netherlands Antilles': 'CW',
+    'West Germany': 'DE',
+}
+
+
+def _normalize(name):
+    """Folds case and whitespace, so table keys match any capitalization ("  united  states" -> "united states")."""
+    return ' '.join(str(name).casefold().split())
+
+
+@lru_cache(maxsize=1)
+def _table():
+    """Loads the name table on first use."""
+    with open(TABLE_PATH, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+@lru_cache(maxsize=4096)
+def country_code(country_name):
+    """
+    Return the alpha-2 code of a country name, alpha-2 or alpha-3 code.
+
+    Args:
+        country_name (str): The name as OMDb spells it, e.g. "USA" or "United Kingdom".
+
+    Returns:
+        str: The alpha-2 code, or None for unknown and historic countries.
+    """
+    code = _table().get(_normalize(country_name))
+    if code is None:
+        print(f"Country code for '{country_name.strip()}' not found.")
+    return code
+
+
+def build_table():
+    """
+    Build the name table from pycountry and ALIASES.
+
+    Every country is listed under its name, official name, common name, alpha-2 and
+    alpha-3 code, the same fields pycountry.countries.lookup() matches.
+
+    Returns:
+        dict: Normalized name -> alpha-2 code.
+    """
+    import pycountry
+
+    table = {}
+    for country in pycountry.countries:
+        for field in ('alpha_2', 'alpha_3', 'name', 'official_name', 'common_name'):
+            value = getattr(country, field, None)
+            if value:
+                table[_normalize(value)] = country.alpha_2
+    for alias, code in ALIASES.items():
+        table[_normalize(alias)] = code
+    return dict(sorted(table.items()))
+
+
+def main():
+    table = build_table()
+    with open(TABLE_PATH, "w", encoding="utf-8") as file:
+        json.dump(table, file, ensure_ascii=False, separators=(',', ':'))
+        file.write("\n")
+    print(f"Wrote {len(table)} names to '{TABLE_PATH}'.")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
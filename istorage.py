@@ -1,4 +1,8 @@
+import heapq
+import os
+import random
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 
 
 class IStorage(ABC):
@@ -36,3 +40,184 @@ class IStorage(ABC):
         Abstract method to update the rating of an existing movie in the storage.
         """
         pass
+
+    def add_many(self, movies):
+        """
+        Add several movies at once.
+
+        Args:
+            movies (iterable): Dicts with the add_movie() arguments as keys ('notes' is optional).
+
+        The default adds them one by one. File based backends override it to write the
+        library only once.
+        """
+        for movie in movies:
+            self.add_movie(movie['title'], movie['year'], movie['rating'], movie['poster'],
+                           movie['imdb_link'], movie['country_code'], movie.get('notes'))
+
+    def update_many(self, updates):
+        """
+        Update several movies at once.
+
+        Args:
+            updates (iterable): Dicts with 'title', 'rating' and an optional 'notes' key.
+
+        The default updates them one by one.
+        """
+        for update in updates:
+            self.update_movie(update['title'], update['rating'], update.get('notes'))
+
+    def delete_many(self, titles):
+        """
+        Delete several movies at once by their titles.
+
+        The default deletes them one by one.
+        """
+        for title in titles:
+            self.delete_movie(title)
+
+    @contextmanager
+    def batch(self):
+        """
+        Group changes so they are written together.
+
+        Usage:
+            with storage.batch():
+                storage.add_movie(...)
+                storage.delete_movie(...)
+
+        The default applies every change as it is made and flushes at the end. Backends
+        that can buffer changes override it to apply the whole block in one write.
+        """
+        yield self
+        self.flush()
+
+    def flush(self):
+        """
+        Persist any buffered changes.
+
+        Backends that write every change straight to their file have nothing to do here.
+        """
+        pass
+
+    # The query methods below have default implementations built on list_movies().
+    # Backends that can answer them without materializing the whole library should
+    # override them.
+
+    def get(self, title):
+        """
+        Return the details of a movie by its title, or None if it is not in the storage.
+        """
+        return self.list_movies().get(title)
+
+    def get_many(self, titles):
+        """
+        Return the (title, details) pairs of the given titles that are in the storage, in the given order.
+
+        The library is read once for all of them, not once per title.
+        """
+        movies = self.list_movies()
+        return [(title, movies[title]) for title in titles if title in movies]
+
+    def search(self, substring, limit=None):
+        """
+        Return (title, details) pairs whose title contains the substring, ignoring case.
+
+        Args:
+            substring (str): Part of the title to look for.
+            limit (int): Maximum number of results. None returns every match.
+        """
+        term = substring.lower()
+        found = []
+        for title, details in self.list_movies().items():
+            if term in title.lower():
+                found.append((title, details))
+                if limit is not None and len(found) >= limit:
+                    break
+        return found
+
+    def top_n(self, by='rating', n=None):
+        """
+        Return (title, details) pairs ordered by a field, highest first and ties by title.
+
+        Args:
+            by (str): The field to order by, 'rating' or 'year'.
+            n (int): Number of movies to return. None returns the whole library.
+        """
+        def key(item):
+            return -_as_number(item[1][by]), item[0]
+
+        items = self.list_movies().items()
+        if n is None:
+            return sorted(items, key=key)
+        return heapq.nsmallest(n, items, key=key)
+
+    def aggregate_stats(self):
+        """
+        Return rating statistics for the library, or None if it is empty.
+
+        The result is a dict with 'count', 'average', 'median', 'best' and 'worst', where
+        'best' and 'worst' are (title, details) pairs.
+        """
+        movies = self.list_movies()
+        if not movies:
+            return None
+        ratings = sorted(_as_number(details['rating']) for details in movies.values())
+        total = len(ratings)
+        if total % 2 == 1:
+            median = ratings[total // 2]
+        else:
+            median = (ratings[total // 2 - 1] + ratings[total // 2]) / 2
+        return {
+            'count': total,
+            'average': sum(ratings) / total,
+            'median': median,
+            'best': max(movies.items(), key=lambda x: _as_number(x[1]['rating'])),
+            'worst': min(movies.items(), key=lambda x: _as_number(x[1]['rating'])),
+        }
+
+    def sample(self, k=1):
+        """
+        Return up to k distinct (title, details) pairs picked at random.
+        """
+        items = list(self.list_movies().items())
+        return random.sample(items, min(k, len(items)))
+
+
+def _as_number(value):
+    """Converts a stored rating or year to a float, treating unparsable values as 0."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def storage_paths(storage):
+    """Returns the files a storage keeps the library in, looking through caching and metrics wrappers."""
+    while storage is not None:
+        if getattr(storage, 'file_paths', None):
+            return list(storage.file_paths)
+        if getattr(storage, 'file_path', None):
+            return [storage.file_path]
+        storage = getattr(storage, '_backend', None) or getattr(storage, '_storage', None)
+    return []
+
+
+def storage_signature(storage):
+    """
+    Return what identifies the current version of a storage's files.
+
+    The inode, mtime and size of every library file and of its journal log and SQLite WAL,
+    so the result changes whenever any writer changes the library. Empty for storages
+    that keep no files.
+    """
+    signature = []
+    for path in storage_paths(storage):
+        for name in (path, path + '.log', path + '-wal'):
+            try:
+                stat = os.stat(name)
+            except FileNotFoundError:
+                signature.append(None)
+                continue
+            signature.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
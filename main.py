@@ -1,8 +1,20 @@
 from movie_app_project.storage_json import StorageJson
 from movie_app_project.storage_csv import StorageCsv
+from movie_app_project.storage_journal import StorageJournal
+from movie_app_project.storage_sqlite import StorageSqlite
+from movie_app_project.storage_binary import StorageBinary
+from movie_app_project.storage_cache import CachedStorage
+from movie_app_project.storage_sharded import ShardedStorage
 from movie_app_project.movie_app import MovieApp
+from movie_app_project.omdb import OmdbClient
+from movie_app_project.omdb_cache import OmdbCache
+from movie_app_project.search_index import SearchIndex
+from movie_app_project.cli import CommandRunner, add_subcommands
+from movie_app_project.metrics import Metrics, InstrumentedStorage
+import atexit
 import os
 import argparse
+import sys
 
 
 def main():
@@ -11,16 +23,77 @@ def main():
     then runs the application.
     """
 
-    parser = argparse.ArgumentParser(description="Movie App")
+    parser = argparse.ArgumentParser(description="Movie App", add_help=False)
     parser.add_argument('storage_file', nargs='?', default='john.json',
-                        help='Path to the storage file (JSON or CSV). Default is "movies.json".')
-
-    # Parse the arguments
-    args = parser.parse_args()
+                        help='Path to the storage file (JSON, CSV, journal, SQLite or binary). Default is "movies.json". '
+                             'Options go before it and a subcommand after it.')
+    parser.add_argument('--cache', action='store_true',
+                        help='Keep a JSON or CSV library in memory and write changes back on the flush policy.')
+    parser.add_argument('--flush-every', type=int, default=None,
+                        help='With --cache, write back after this many changes.')
+    parser.add_argument('--flush-interval', type=float, default=None,
+                        help='With --cache, write back this many seconds after the first change.')
+
+    parser.add_argument('--optimistic', action='store_true',
+                        help='For JSON or CSV files shared by several writers, read without the lock and '
+                             'retry writes that lost a race instead of locking every change.')
+    parser.add_argument('--import-file', default=None,
+                        help='Import the titles or IMDb IDs listed in this file (one per line) and exit.')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='With --import-file, number of concurrent OMDb lookups.')
+    parser.add_argument('--rate-limit', type=float, default=10.0,
+                        help='With --import-file, maximum OMDb requests per second.')
+    parser.add_argument('--retries', type=int, default=3,
+                        help='With --import-file, retries for lookups that fail with a transient error.')
+
+    parser.add_argument('--refresh-ratings', action='store_true',
+                        help='Re-query OMDb for every movie, store the ratings that changed and exit.')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='With --refresh-ratings, maximum number of lookups in flight.')
+    parser.add_argument('--omdb-cache', default=None,
+                        help='Path to the OMDb response cache. Default is ".omdb_cache.sqlite" next to the storage file.')
+    parser.add_argument('--no-omdb-cache', action='store_true',
+                        help='Always ask the OMDb API instead of using the response cache.')
+    parser.add_argument('--no-search-index', action='store_true',
+                        help='Search by scanning all titles instead of using the title index.')
+    parser.add_argument('--search-notes', action='store_true',
+                        help='Also match the notes of movies when searching.')
+    parser.add_argument('--shard', action='append', default=[], metavar='FILE',
+                        help='Mount another library file as a shard of one library together with the storage '
+                             'file, e.g. to search or rank the movies of several users. Can be repeated. '
+                             'New movies are added to the storage file.')
+    parser.add_argument('--shard-workers', type=int, default=None,
+                        help='With --shard, number of processes querying JSON and CSV shards. Default is one per CPU.')
+    parser.add_argument('--metrics', default=None, metavar='FILE',
+                        help='Record timings of storage calls, file access, commands and OMDb requests and write '
+                             'them to FILE on exit, as Prometheus text for .prom files and JSON otherwise.')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='Record the same metrics and serve them in Prometheus format on '
+                             'http://127.0.0.1:PORT/metrics while the app runs.')
+
+    # Parse the arguments. argparse would take a lone storage file for a subcommand, so the options and
+    # the storage file are parsed first and the subcommands only if one of them follows.
+    args, rest = parser.parse_known_args()
+    parser.add_argument('-h', '--help', action='help', help='Show this help message and exit.')
+    commands = add_subcommands(parser)
+    if args.storage_file in commands or (rest and rest[0] in commands):
+        args = parser.parse_args()
+    elif '-h' in rest or '--help' in rest:
+        parser.print_help()
+        return 0
+    elif rest:
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+    else:
+        args.command = None
     storage_file = args.storage_file.strip()
 
+    # Subcommands never prompt: reading commands need an existing library, changing ones create it empty
+    if args.command and not os.path.exists(storage_file) and args.command not in ('add', 'import', 'script'):
+        print(f"Storage file '{storage_file}' does not exist.", file=sys.stderr)
+        return 1
+
     # If the storage file doesn't exist, prompt the user to create a new one
-    if not os.path.exists(storage_file):
+    if not args.command and not os.path.exists(storage_file):
         print(f"Storage file '{storage_file}' does not exist.")
 
         # Ask the user if they want to create a new file
@@ -30,11 +103,12 @@ def main():
             return
 
         # Ask the user for a name for the new file
-        new_file_name = input("Enter a name for the new file (with .json or .csv extension): ").strip()
+        new_file_name = input("Enter a name for the new file (with .json, .csv, .journal, .db, .sqlite or .mvb extension): ").strip()
 
         # Check if the user entered a valid file type
-        if not (new_file_name.endswith('.json') or new_file_name.endswith('.csv')):
-            print("Invalid file type. Please provide a file with a .json or .csv extension.")
+        if not new_file_name.endswith(('.json', '.csv', '.journal', '.db', '.sqlite', '.mvb')):
+            print("Invalid file type. Please provide a file with a .json, .csv, .journal, .db, .sqlite or .mvb "
+                  "extension.")
             return
 
         # Update the storage_file variable with the new file name
@@ -42,15 +116,21 @@ def main():
 
     # Initialize the storage based on the file extension
     if storage_file.endswith('.json'):
-        storage = StorageJson(storage_file)
+        storage = StorageJson(storage_file, optimistic=args.optimistic)
     elif storage_file.endswith('.csv'):
-        storage = StorageCsv(storage_file)
+        storage = StorageCsv(storage_file, optimistic=args.optimistic)
+    elif storage_file.endswith('.journal'):
+        storage = StorageJournal(storage_file)
+    elif storage_file.endswith(('.db', '.sqlite')):
+        storage = StorageSqlite(storage_file)
+    elif storage_file.endswith('.mvb'):
+        storage = StorageBinary(storage_file, optimistic=args.optimistic)
     else:
-        print("Invalid file type. Please provide a .json or .csv file.")
-        return
+        print("Invalid file type. Please provide a .json, .csv, .journal, .db, .sqlite or .mvb file.")
+        return 1
 
     # If the file still doesn't exist (new file), create it
-    if not os.path.exists(storage_file):
+    if not args.command and not os.path.exists(storage_file):
         print(f"Creating a new file: '{storage_file}'.")
 
         # Initialize an empty library for the new user by adding a placeholder movie
@@ -65,12 +145,93 @@ def main():
         )
         print(f"Initialized new storage with a sample movie in '{storage_file}'.")
 
+    # Several libraries are queried together as the shards of one, the storage file first
+    if args.shard:
+        missing = [path for path in args.shard if not os.path.exists(path)]
+        if missing:
+            print(f"Shard file '{missing[0]}' does not exist.", file=sys.stderr)
+            return 1
+        try:
+            storage = ShardedStorage([storage_file, *args.shard], workers=args.shard_workers,
+                                     optimistic=args.optimistic)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+        # Stops the worker processes the shards were queried in
+        atexit.register(storage.close)
+
+    # Metrics are only recorded when asked for, otherwise nothing is wrapped or timed
+    metrics = None
+    if args.metrics or args.metrics_port is not None:
+        metrics = Metrics()
+        if args.metrics:
+            atexit.register(metrics.write, args.metrics)
+        if args.metrics_port is not None:
+            metrics.serve(port=args.metrics_port)
+
+    # Serve reads from memory and write changes back lazily if requested
+    if args.cache and isinstance(storage, (StorageJson, StorageCsv)):
+        storage = CachedStorage(storage, flush_every=args.flush_every, flush_interval=args.flush_interval,
+                                metrics=metrics)
+    if metrics is not None:
+        storage = InstrumentedStorage(storage, metrics)
+
+    # Repeated OMDb lookups are answered from the response cache
+    omdb_cache = None
+    if not args.no_omdb_cache:
+        omdb_cache = OmdbCache(args.omdb_cache or os.path.join(
+            os.path.dirname(os.path.abspath(storage_file)), '.omdb_cache.sqlite'))
+    omdb = OmdbClient(cache=omdb_cache, pool_size=max(args.workers, 1), metrics=metrics)
+
+    # Bulk import runs without the menu
+    if args.import_file:
+        from movie_app_project.bulk_import import BulkImporter
+        importer = BulkImporter(storage, omdb, workers=args.workers, rate_limit=args.rate_limit,
+                                retries=args.retries)
+        result = importer.import_file(args.import_file)
+        storage.flush()
+        print(f"Imported {len(result['added'])} movies, skipped {len(result['skipped'])} already in the library, "
+              f"{len(result['not_found'])} not found, {len(result['failed'])} failed.")
+        return
+
+    # Rating refresh runs without the menu and resumes from "<storage file>.refresh" if interrupted
+    if args.refresh_ratings:
+        import asyncio
+        from movie_app_project.rating_refresh import RatingRefresher
+        refresher = RatingRefresher(storage, omdb, concurrency=args.concurrency,
+                                    state_path=storage_file + '.refresh')
+        changes = asyncio.run(refresher.run())
+        for title, old, new in changes:
+            print(f"{title}: {old} -> {new}")
+        print(f"Refreshed ratings, {len(changes)} changed.")
+        return
+
+    # Title search uses an n-gram index saved as "<storage file>.search", rebuilt when the library
+    # changed. SQLite libraries search in SQL and sharded ones search every shard instead, and one-off
+    # subcommands that do not search skip it.
+    search_index = None
+    if (not args.no_search_index and not args.shard and not storage_file.endswith(('.db', '.sqlite'))
+            and args.command in (None, 'search', 'script')):
+        search_index = SearchIndex(storage_file + '.search',
+                                   source_paths=[storage_file, storage_file + '.log'],
+                                   include_notes=args.search_notes)
+        search_index.sync(storage.list_movies)
+
+    # A subcommand runs without the menu and its exit status becomes the program's
+    if args.command:
+        importer = None
+        if args.command in ('import', 'script'):
+            from movie_app_project.bulk_import import BulkImporter
+            importer = BulkImporter(storage, omdb, workers=args.workers, rate_limit=args.rate_limit,
+                                    retries=args.retries)
+        return CommandRunner(storage, omdb, importer, search_index, metrics=metrics).run(args)
+
     # Create a MovieApp object with the chosen storage type
-    movie_app = MovieApp(storage)
+    movie_app = MovieApp(storage, omdb, search_index, metrics)
 
     # Run the app
     movie_app.run()
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,307 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from movie_app_project.istorage import IStorage
+from movie_app_project.storage_file import atomic_open
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# (method, direction, attribute holding the file, whether the method appends to the file)
+FILE_ACCESS_METHODS = (
+    ('_read_storage', 'read', 'file_path', False),
+    ('_write_storage', 'write', 'file_path', False),
+    ('_read_snapshot', 'read', 'file_path', False),
+    ('_write_snapshot', 'write', 'file_path', False),
+    ('_write_records', 'write', 'log_path', True),
+)
+
+
+def _file_size(path):
+    """Returns the size of a file, 0 if it does not exist."""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _key(name, labels):
+    """Returns the registry key of a metric, with the label values as strings."""
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+def _label_text(labels):
+    """Formats sorted (name, value) label pairs the Prometheus way, e.g. '{method="get"}'."""
+    if not labels:
+        return ""
+    escaped = ((name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+               for name, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class Histogram:
+    """
+    Counts of observed values per bucket, plus their number and sum.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one counts values above every bucket
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """Adds a value to its bucket."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """Returns (upper bound, number of values up to it) pairs, ending with ('+Inf', count)."""
+        total, pairs = 0, []
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+class Metrics:
+    """
+    Counters and latency histograms, exported as a JSON or Prometheus text file or
+    served on a Prometheus /metrics endpoint.
+
+    Nothing in the app records metrics unless a Metrics instance is handed to it, so
+    with metrics disabled the only cost left is an `is None` check in a few places.
+    Every metric is identified by its name and keyword labels, e.g.
+    `metrics.inc('omdb_cache_lookups_total', result='hit')`.
+    """
+
+    def __init__(self):
+        """Initialize an empty Metrics registry."""
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name, amount=1, **labels):
+        """Adds amount to a counter."""
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        """Records a duration in a latency histogram."""
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Records how long the block took in a latency histogram, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, function, name, **labels):
+        """Returns function wrapped so every call is recorded in a latency histogram."""
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with self.timer(name, **labels):
+                return function(*args, **kwargs)
+        return wrapper
+
+    def snapshot(self):
+        """
+        Return all metrics as plain data.
+
+        Returns:
+            dict: 'counters' with name, labels and value, and 'histograms' with name,
+                labels, count, sum and cumulative bucket counts.
+        """
+        with self._lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in sorted(self._counters.items())]
+            histograms = [{'name': name, 'labels': dict(labels), 'count': histogram.count, 'sum': histogram.sum,
+                           'buckets': {str(bound): count for bound, count in histogram.cumulative()}}
+                          for (name, labels), histogram in sorted(self._histograms.items())]
+        return {'counters': counters, 'histograms': histograms}
+
+    def render(self):
+        """Returns all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name}{_label_text(labels)} {value}")
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} histogram")
+                for bound, count in histogram.cumulative():
+                    lines.append(f"{name}_bucket{_label_text(labels + (('le', bound),))} {count}")
+                lines.append(f"{name}_sum{_label_text(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{_label_text(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Writes the metrics to a file, as Prometheus text for '.prom' and '.txt' files and as JSON otherwise."""
+        with atomic_open(path) as file:
+            if path.endswith(('.prom', '.txt')):
+                file.write(self.render())
+            else:
+                json.dump(self.snapshot(), file, indent=2)
+
+    def serve(self, host="127.0.0.1", port=9100):
+        """
+        Serve the metrics in Prometheus text format on http://host:port/metrics from a background thread.
+
+        Returns:
+            ThreadingHTTPServer: The running server; shutdown() stops it.
+        """
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler  # only needed with a metrics port
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+class InstrumentedStorage(IStorage):
+    """
+    IStorage wrapper that records the latency of every call in Metrics.
+
+    Calls are recorded as `storage_call_seconds{method=...}`. The file accesses of the
+    storage underneath (the whole-file reads and writes of JSON, CSV and binary files,
+    and the snapshot and log writes of a journal) are also timed on their own as
+    `storage_file_seconds{direction=...}`, separating parsing and serialization from the
+    rest of a call, and their sizes are counted in `storage_file_bytes_total`. A
+    CachedStorage is looked through to the file backend it wraps.
+    """
+
+    def __init__(self, storage, metrics):
+        """
+        Initialize the InstrumentedStorage.
+
+        Args:
+            storage (IStorage): The storage to instrument.
+            metrics (Metrics): Where the measurements go.
+        """
+        self._storage = storage
+        self._metrics = metrics
+        self.file_path = getattr(storage, 'file_path', None)
+        self._instrument_file_access(getattr(storage, '_backend', storage))
+
+    def _instrument_file_access(self, backend):
+        """Replaces the file access methods of the backend instance with timed and counted ones."""
+        for method, direction, path_attribute, appends in FILE_ACCESS_METHODS:
+            path = getattr(backend, path_attribute, None)
+            if path and callable(getattr(backend, method, None)):
+                setattr(backend, method, self._file_access(getattr(backend, method), direction, path, appends))
+
+    def _file_access(self, function, direction, path, appends):
+        """Returns a file access method that records its duration and the bytes it read or wrote."""
+        metrics = self._metrics
+
+        @wraps(function)
+        def wrapper(*args):
+            size_before = _file_size(path) if appends or direction == 'read' else 0
+            with metrics.timer('storage_file_seconds', direction=direction, file=os.path.basename(path)):
+                result = function(*args)
+            size = size_before if direction == 'read' else _file_size(path) - size_before
+            metrics.inc('storage_file_bytes_total', max(size, 0), direction=direction, file=os.path.basename(path))
+            return result
+        return wrapper
+
+    def _call(self, method, *args):
+        """Calls a method of the wrapped storage and records its latency."""
+        with self._metrics.timer('storage_call_seconds', method=method):
+            return getattr(self._storage, method)(*args)
+
+    @contextmanager
+    def batch(self):
+        """Runs the block in a batch of the wrapped storage, recording the whole batch as one call."""
+        with self._metrics.timer('storage_call_seconds', method='batch'), self._storage.batch():
+            yield self
+
+    def flush(self):
+        """Flush the wrapped storage."""
+        return self._call('flush')
+
+    def list_movies(self):
+        """List all movies of the wrapped storage."""
+        return self._call('list_movies')
+
+    def add_movie(self, title, year, rating, poster, imdb_link, country_code, notes=None):
+        """Add a movie to the wrapped storage."""
+        return self._call('add_movie', title, year, rating, poster, imdb_link, country_code, notes)
+
+    def delete_movie(self, title):
+        """Delete a movie from the wrapped storage."""
+        return self._call('delete_movie', title)
+
+    def update_movie(self, title, rating, notes=None):
+        """Update a movie in the wrapped storage."""
+        return self._call('update_movie', title, rating, notes)
+
+    def add_many(self, movies):
+        """Add several movies to the wrapped storage."""
+        return self._call('add_many', movies)
+
+    def update_many(self, updates):
+        """Update several movies in the wrapped storage."""
+        return self._call('update_many', updates)
+
+    def delete_many(self, titles):
+        """Delete several movies from the wrapped storage."""
+        return self._call('delete_many', titles)
+
+    def get(self, title):
+        """Return the details of a movie from the wrapped storage."""
+        return self._call('get', title)
+
+    def get_many(self, titles):
+        """Return the details of several movies from the wrapped storage."""
+        return self._call('get_many', titles)
+
+    def search(self, substring, limit=None):
+        """Search the titles of the wrapped storage."""
+        return self._call('search', substring, limit)
+
+    def top_n(self, by='rating', n=None):
+        """Return the wrapped storage's movies ordered by rating or year."""
+        return self._call('top_n', by, n)
+
+    def aggregate_stats(self):
+        """Return the statistics of the wrapped storage."""
+        return self._call('aggregate_stats')
+
+    def sample(self, k=1):
+        """Return random movies from the wrapped storage."""
+        return self._call('sample', k)
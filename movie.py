@@ -0,0 +1,88 @@
+import sys
+from collections.abc import MutableMapping
+
+FIELDS = ('year', 'rating', 'poster', 'imdb_link', 'country_code', 'notes')
+ROW_FIELDS = ('title', 'year', 'rating', 'country_code', 'imdb_link', 'poster', 'notes')
+
+
+def _intern(value):
+    """Interns strings that repeat across the library, such as years and country codes."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _as_rating(value):
+    """Converts a stored rating to a float, treating unparsable values as 0."""
+    try:
+        return float(value or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def movie_row(title, details):
+    """Flattens a movie into a dict with a fixed set of columns, for JSON and CSV output."""
+    row = {'title': title}
+    row.update((field, details.get(field)) for field in ROW_FIELDS[1:])
+    return row
+
+
+class Movie(MutableMapping):
+    """
+    The details of one movie, stored in slots instead of a per-movie dict.
+
+    A Movie behaves like the details dict the storages used to return: `movie['year']`,
+    `movie.get('notes')`, `dict(movie)` and item assignment all work, and 'notes' is
+    only present when the movie has notes. Rating is always a float, and years and
+    country codes are interned so the library shares one copy of each.
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, year='', rating=0.0, poster='', imdb_link='', country_code=None, notes=None):
+        self.year = _intern(year)
+        self.rating = _as_rating(rating)
+        self.poster = poster
+        self.imdb_link = imdb_link
+        self.country_code = _intern(country_code)
+        self.notes = notes or None
+
+    @classmethod
+    def from_dict(cls, details):
+        """Builds a Movie from a details dict (or any mapping), ignoring unknown keys."""
+        return cls(**{field: details[field] for field in FIELDS if field in details})
+
+    def copy(self):
+        """Returns an independent copy of the movie."""
+        return Movie(self.year, self.rating, self.poster, self.imdb_link, self.country_code, self.notes)
+
+    def __getitem__(self, key):
+        if key not in FIELDS or (key == 'notes' and self.notes is None):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in FIELDS:
+            raise KeyError(key)
+        if key == 'rating':
+            value = _as_rating(value)
+        elif key in ('year', 'country_code'):
+            value = _intern(value)
+        elif key == 'notes':
+            value = value or None
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        if key != 'notes' or self.notes is None:
+            raise KeyError(key)
+        self.notes = None
+
+    def __iter__(self):
+        return iter(FIELDS if self.notes is not None else FIELDS[:-1])
+
+    def __len__(self):
+        return len(FIELDS) if self.notes is not None else len(FIELDS) - 1
+
+    def __contains__(self, key):
+        return key in FIELDS and (key != 'notes' or self.notes is not None)
+
+    def __repr__(self):
+        return f"Movie({dict(self)!r})"
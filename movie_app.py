@@ -1,6 +1,11 @@
-import requests
 import os
-import pycountry
+from movie_app_project.omdb import OmdbClient, OmdbError, OmdbRequestError
+from movie_app_project.website import WebsiteGenerator, PaginatedSiteGenerator
+from movie_app_project.istorage import storage_signature
+from movie_app_project.rating_index import RatingIndex
+
+
+SORTED_PAGE_SIZE = 20
 
 
 class MovieApp:
@@ -9,55 +14,83 @@ class MovieApp:
     and provides menu-based interaction for users.
     """
 
-    API_KEY = "e88a7016"
-    BASE_URL = f"http://www.omdbapi.com/?apikey={API_KEY}&"
-
-    def __init__(self, storage):
+    def __init__(self, storage, omdb=None, search_index=None, metrics=None):
         """
         Initialize the MovieApp with a given storage backend.
 
         Args:
             storage (IStorage): A storage backend that implements the IStorage interface.
+            omdb (OmdbClient): The OMDb client used to look up movies. Defaults to the public API.
+            search_index (SearchIndex): Title index used by the search command, kept current
+                by the add, delete and update commands. Without it, search scans the titles.
+            metrics (Metrics): If given, the duration of every menu command is recorded.
         """
         self._storage = storage
-
-    @staticmethod
-    def _get_country_code(country_name):
-        """Fetch the country code for the given country name."""
-        try:
-            country = pycountry.countries.lookup(country_name.strip())
-            return country.alpha_2 if hasattr(country, 'alpha_2') else None
-        except (LookupError, AttributeError) as e:
-            print(f"Country code for '{country_name}' not found: {e}.")
-        return None
+        self._omdb = omdb or OmdbClient()
+        self._search_index = search_index
+        self._metrics = metrics
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        self._website = WebsiteGenerator(os.path.join(current_dir, 'index_template.html'))
+        self._paginated_website = PaginatedSiteGenerator(
+            os.path.join(current_dir, 'page_template.html'),
+            os.path.join(current_dir, 'style.css'),
+            by_year=True,
+            by_country=True)
+        self._stats = None
+        self._ratings = None
+        self._signature = None
+
+    def _check_indexes(self):
+        """
+        Drops the rating index and the stats engine and re-syncs the search index if another
+        writer changed the storage files.
+        """
+        signature = storage_signature(self._storage)
+        if signature != self._signature:
+            self._ratings = None
+            self._stats = None
+            self._signature = signature
+            if self._search_index is not None:
+                self._search_index.sync(self._storage.list_movies)
+
+    def _changed(self):
+        """Records a change made through the app, which the indexes follow, so it does not count as an outside change."""
+        self._signature = storage_signature(self._storage)
+        if self._search_index is not None:
+            self._search_index.caught_up()
+
+    def _rating_index(self):
+        """Returns the rating index, building it from the library on first use or after outside changes."""
+        self._check_indexes()
+        if self._ratings is None:
+            self._ratings = RatingIndex.from_movies(self._storage.list_movies())
+        return self._ratings
+
+    def _stats_engine(self):
+        """
+        Returns the stats engine, building it from the library on first use or after outside
+        changes, or None without NumPy.
+        """
+        self._check_indexes()
+        if self._stats is None:
+            # NumPy is imported on the first stats command rather than at startup
+            try:
+                from movie_app_project.stats_engine import StatsEngine
+            except ImportError:  # NumPy is optional, statistics then come from the rating index only
+                return None
+            self._stats = StatsEngine.from_movies(self._storage.list_movies())
+        return self._stats
 
     def _fetch_movie_data(self, title):
         """Fetch movie data from the OMDb API."""
         try:
-            response = requests.get(self.BASE_URL + f"t={title}")
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('Response') == "True":
-                    try:
-                        rating = float(data.get("imdbRating", 0.0))
-                    except ValueError:
-                        rating = 0.0
-                    imdb_link = f"https://www.imdb.com/title/{data.get('imdbID', 'N/A')}/"
-                    country_code = self._get_country_code(data.get("Country", "").split(",")[0]) if data.get(
-                        "Country") else None
-                    return {
-                        "title": data.get("Title", "N/A"),
-                        "year": data.get("Year", "N/A"),
-                        "rating": rating,
-                        "poster": data.get("Poster", ""),
-                        "imdb_link": imdb_link,
-                        "country_code": country_code
-                    }
-                else:
-                    print(f"Movie '{title}' not found!")
-            else:
-                print(f"Failed to fetch data from OMDb API. Status code: {response.status_code}")
-        except requests.exceptions.RequestException as e:
+            movie_data = self._omdb.fetch(title)
+            if movie_data:
+                return movie_data
+            print(f"Movie '{title}' not found!")
+        except OmdbError as e:
+            print(f"Failed to fetch data from OMDb API. Status code: {e.status_code}")
+        except OmdbRequestError as e:
             print(f"Error fetching data from OMDb API: {e}")
         return None
 
@@ -74,54 +107,58 @@ class MovieApp:
 
     def _command_movie_stats(self):
         """Display various movie statistics like average, median, best and worst movies."""
-        movies = self._storage.list_movies()
+        stats = self._rating_index().summary()
 
-        if not movies:
+        if not stats:
             print("No movies in the storage.")
             return
 
-        total_movies = len(movies)
-        total_rating = 0.0
-        ratings = []  # To calculate the median
-
-        for details in movies.values():
-            rating = float(details['rating'])  # Convert rating to float
-            total_rating += rating
-            ratings.append(rating)  # Store rating for median calculation
-
-        average_rating = total_rating / total_movies
-
-        # Calculate median
-        ratings.sort()  # Sort ratings to find the median
-        if total_movies % 2 == 1:  # Odd number of ratings
-            median_rating = ratings[total_movies // 2]
-        else:  # Even number of ratings
-            median_rating = (ratings[total_movies // 2 - 1] + ratings[total_movies // 2]) / 2
+        # The index holds titles and ratings only, the years of the best and worst come from the library
+        movies = dict(self._storage.get_many([stats['best'][0], stats['worst'][0]]))
+        best_movie = stats['best'][0], movies[stats['best'][0]]
+        worst_movie = stats['worst'][0], movies[stats['worst'][0]]
 
-        if len(movies) == 1:
-            title, details = list(movies.items())[0]
+        if stats['count'] == 1:
+            title, details = best_movie
             print(f"There is 1 movie in the library: ")
             print(f"Movie: {title} ({details['year']}), Rating: {float(details['rating']):.2f}")
-        else:
-            best_movie = max(movies.items(), key=lambda x: float(x[1]['rating']))
-            worst_movie = min(movies.items(), key=lambda x: float(x[1]['rating']))
+            return
 
-            print(f"Average rating: {average_rating:.2f}")
-            print(f"Median rating: {median_rating:.2f}")
-            print(f"Best movie: {best_movie[0]} ({best_movie[1]['year']}), Rating: {best_movie[1]['rating']}")
-            print(f"Worst movie: {worst_movie[0]} ({worst_movie[1]['year']}), Rating: {worst_movie[1]['rating']}")
+        print(f"Average rating: {stats['average']:.2f}")
+        print(f"Median rating: {stats['median']:.2f}")
+        print(f"Best movie: {best_movie[0]} ({best_movie[1]['year']}), Rating: {best_movie[1]['rating']}")
+        print(f"Worst movie: {worst_movie[0]} ({worst_movie[1]['year']}), Rating: {worst_movie[1]['rating']}")
+
+        engine = self._stats_engine()
+        if engine is not None:
+            self._print_distribution(engine.report())
+
+    def _print_distribution(self, report):
+        """Print percentiles, the rating histogram and the best rated years and countries."""
+        percentiles = ", ".join(f"p{p}: {value:.2f}" for p, value in report['percentiles'].items())
+        print(f"Percentiles: {percentiles}")
+        print("Rating histogram:")
+        widest = max(count for _, _, count in report['histogram']) or 1
+        for low, high, count in report['histogram']:
+            print(f"  {low:4.1f}-{high:4.1f} | {'#' * round(30 * count / widest):<30} {count}")
+        for label, groups in (("years", report['by_year']), ("countries", report['by_country'])):
+            ranked = sorted(((key, value) for key, value in groups.items() if key is not None),
+                            key=lambda group: (-group[1][1], str(group[0])))[:5]
+            if ranked:
+                best = ", ".join(f"{key} ({average:.2f} over {count})" for key, (count, average) in ranked)
+                print(f"Best rated {label}: {best}")
 
     def _command_add_movie(self):
         """Add a new movie to the storage."""
         title = input("Enter the movie title: ")
-        movies = self._storage.list_movies()
 
-        if title in movies:
+        if self._storage.get(title) is not None:
             print(f"Movie '{title}' already exists!")
             return
 
         movie_data = self._fetch_movie_data(title)
         if movie_data:
+            self._check_indexes()
             self._storage.add_movie(
                 title=movie_data['title'],
                 year=movie_data['year'],
@@ -130,15 +167,29 @@ class MovieApp:
                 imdb_link=movie_data['imdb_link'],
                 country_code=movie_data['country_code']
             )
+            if self._stats is not None:
+                self._stats.add(movie_data['title'], movie_data)
+            if self._ratings is not None:
+                self._ratings.add(movie_data['title'], movie_data)
+            if self._search_index is not None:
+                self._search_index.add(movie_data['title'], movie_data)
+            self._changed()
             print(f"Movie '{title}' added successfully.")
 
     def _command_delete_movie(self):
         """Delete a movie from the storage."""
         title = input("Enter the movie title to delete: ")
-        movies = self._storage.list_movies()
 
-        if title in movies:
+        if self._storage.get(title) is not None:
+            self._check_indexes()
             self._storage.delete_movie(title)
+            if self._stats is not None:
+                self._stats.remove(title)
+            if self._ratings is not None:
+                self._ratings.remove(title)
+            if self._search_index is not None:
+                self._search_index.remove(title)
+            self._changed()
             print(f"Movie '{title}' deleted successfully.")
         else:
             print(f"Movie '{title}' not found.")
@@ -146,9 +197,8 @@ class MovieApp:
     def _command_update_movie(self):
         """Update the rating and notes for a movie."""
         title = input("Enter the movie title: ")
-        movies = self._storage.list_movies()
 
-        if title not in movies:
+        if self._storage.get(title) is None:
             print(f"Movie '{title}' not found!")
             return
 
@@ -164,91 +214,125 @@ class MovieApp:
 
         add_note = input("Do you want to add a note? (y/n): ").lower()
         note = input("Enter the note: ") if add_note == 'y' else None
+        self._check_indexes()
         self._storage.update_movie(title, rating, note)
+        if self._stats is not None:
+            self._stats.update(title, rating)
+        if self._ratings is not None:
+            self._ratings.update(title, rating)
+        if self._search_index is not None and note is not None:
+            self._search_index.add(title, self._storage.get(title))
+        self._changed()
         print(f"Movie '{title}' updated successfully.")
 
     def _command_random_movie(self):
         """Pick a random movie from the storage."""
-        import random  # Used here in this specific function
-        movies = self._storage.list_movies()
+        picks = self._storage.sample(1)
 
-        if not movies:
+        if not picks:
             print("No movies available.")
             return
 
-        title, details = random.choice(list(movies.items()))
+        title, details = picks[0]
         print(f"Random movie: {title}, Rating: {details['rating']}")
 
     def _command_search_movie(self):
-        """Search for a movie by part of its title."""
-        search_term = input("Enter part of the movie title: ").lower()
-        movies = self._storage.list_movies()
+        """Search for a movie by part of its title, suggesting close titles if nothing matches."""
+        search_term = input("Enter part of the movie title: ")
+
+        if self._search_index is None:
+            found = self._storage.search(search_term)
+            suggestions = []
+        else:
+            self._check_indexes()
+            found = self._indexed_movies(self._search_index.search(search_term))
+            suggestions = [] if found else self._indexed_movies(
+                self._search_index.search(search_term, limit=5, fuzzy=True))
 
-        found_movies = [f"{title}, ({details['year']}), {details['rating']}" for title, details in movies.items() if
-                        search_term in title.lower()]
+        found_movies = [f"{title}, ({details['year']}), {details['rating']}" for title, details in found]
         if found_movies:
             print("\n".join(found_movies))
+        elif suggestions:
+            print("No matching movies found. Did you mean:")
+            print("\n".join(f"{title}, ({details['year']}), {details['rating']}" for title, details in suggestions))
         else:
             print("No matching movies found.")
 
+    def _indexed_movies(self, titles):
+        """Look up the (title, details) pairs of titles found in the search index."""
+        return self._storage.get_many(titles)
+
     def _command_movies_sorted_by_rating(self):
-        """Display all movies sorted by rating."""
-        movies = self._storage.list_movies()
+        """Display all movies sorted by rating, one page at a time."""
+        index = self._rating_index()
 
-        if not movies:
+        if not len(index):
             print("No movies in the library.")
             return
 
-        sorted_movies = sorted(movies.items(), key=lambda x: (-float(x[1]['rating']), x[0]))
         print("Movies sorted by rating: \n")
 
-        for title, details in sorted_movies:
+        pages = (len(index) + SORTED_PAGE_SIZE - 1) // SORTED_PAGE_SIZE
+        for number in range(pages):
+            self._print_rated_movies(index.page(number, SORTED_PAGE_SIZE))
+            if number + 1 < pages:
+                more = input(f"-- Page {number + 1} of {pages}. Press Enter for more, or 'q' to stop: ")
+                if more.strip().lower() == 'q':
+                    break
+
+    def _command_movies_in_rating_range(self):
+        """Display the movies rated within a range, highest first."""
+        try:
+            low = float(input("Enter the lowest rating: "))
+            high = float(input("Enter the highest rating: "))
+        except ValueError:
+            print("Invalid input, please enter a number.")
+            return
+
+        found = self._rating_index().between(low, high)
+        if not found:
+            print(f"No movies rated between {low} and {high}.")
+            return
+
+        print(f"{len(found)} movies rated between {low} and {high}: \n")
+        self._print_rated_movies(found)
+
+    def _print_rated_movies(self, ranked):
+        """Print (title, rating) pairs from the rating index with the years read from the library at once."""
+        for title, details in self._storage.get_many(title for title, _ in ranked):
             print(f"Movie: {title} ({details['year']}), Rating: {float(details['rating'])}")
 
     def _generate_website(self):
         """Generate an HTML page with the movie list."""
         try:
-            movies = self._storage.list_movies()
-            template_title = "My Movie App"
-            template_movie_grid = ""
-
-            for title, details in movies.items():
-                notes = details.get('notes', '')
-                imdb_link = details.get('imdb_link', '#')
-                country_flag_url = f"https://flagcdn.com/32x24/{details['country_code'].lower()}.png" \
-                    if details.get('country_code') else ""
-
-                flag_img_tag = f"<img src='{country_flag_url}' alt='Country Flag' class='country-flag' />" \
-                    if country_flag_url else ""
-
-                template_movie_grid += (f"<li class='movie'>\
-                    <a href='{imdb_link}' target='_blank'><img src='{details['poster']}' \
-                    alt='Movie Poster' class='movie-poster'></a>\
-                    <div class='movie-details'>\
-                    <div class='movie-title'>{title}</div>\
-                    <div class='movie-year'>{details['year']}</div>\
-                    <div class='movie-rating'>Rating: {details['rating']}</div>\
-                    {flag_img_tag}\
-                    <div class='movie-notes'>{notes}</div>\
-                    </div></li>\n")
-
             current_dir = os.path.dirname(os.path.abspath(__file__))
-            template_file_path = os.path.join(current_dir, 'index_template.html')
-            with open(template_file_path, 'r') as file:
-                template_content = file.read()
-
-            template_content = template_content.replace('__TEMPLATE_TITLE__', template_title)
-            template_content = template_content.replace('__TEMPLATE_MOVIE_GRID__', template_movie_grid)
-
             output_file_path = os.path.join(current_dir, '../my_movie_app.html')
-            with open(output_file_path, 'w') as file:
-                file.write(template_content)
+            self._website.generate(self._storage.list_movies(), output_file_path)
 
             print("Website generated successfully.")
 
         except Exception as e:
             print(f"Error generating website: {e}")
 
+    def _generate_paginated_website(self):
+        """Generate a directory of paginated HTML pages with per-year and per-country indexes."""
+        try:
+            current_dir = os.path.dirname(os.path.abspath(__file__))
+            output_dir = os.path.join(current_dir, '../my_movie_app')
+            written = self._paginated_website.generate(self._storage.list_movies(), output_dir)
+
+            print(f"Paginated website generated successfully ({written} pages updated).")
+
+        except Exception as e:
+            print(f"Error generating paginated website: {e}")
+
+    def _command_exit(self):
+        """Write back any buffered changes and say goodbye."""
+        self._storage.flush()
+        if self._search_index is not None:
+            self._search_index.save()
+        print("Exiting... Thank you for using My Movie app!")
+
     def run(self):
         """Run the MovieApp by displaying a menu and handling user commands."""
         commands = {
@@ -261,8 +345,16 @@ class MovieApp:
             "7": ("Search movie", self._command_search_movie),
             "8": ("Movies sorted by rating", self._command_movies_sorted_by_rating),
             "9": ("Generate website", self._generate_website),
-            "0": ("Exit", lambda: print("Exiting... Thank you for using My Movie app!"))
+            "10": ("Generate paginated website", self._generate_paginated_website),
+            "11": ("Movies in rating range", self._command_movies_in_rating_range),
+            "0": ("Exit", self._command_exit)
         }
+        if self._metrics is not None:
+            commands = {
+                cmd_id: (cmd_description, self._metrics.timed(
+                    command, 'app_command_seconds', command=command.__name__.removeprefix('_command_').lstrip('_')))
+                for cmd_id, (cmd_description, command) in commands.items()
+            }
 
         while True:
             print("\nMovie App Menu")
@@ -0,0 +1,162 @@
+import threading
+import time
+from movie_app_project.countries import country_code as get_country_code
+from movie_app_project.omdb_cache import cache_key
+
+
+class OmdbError(Exception):
+    """
+    Raised when the OMDb API answers with an unexpected HTTP status.
+    """
+
+    def __init__(self, status_code):
+        super().__init__(f"OMDb API returned status code {status_code}")
+        self.status_code = status_code
+
+    @property
+    def retryable(self):
+        """True for rate limiting and server side errors, which are worth another try."""
+        return self.status_code == 429 or self.status_code >= 500
+
+
+class OmdbRequestError(Exception):
+    """
+    Raised when a request to the OMDb API fails without an answer, e.g. on a connection error or timeout.
+    """
+
+
+class OmdbClient:
+    """
+    Small client for the OMDb API that turns responses into movie data dicts.
+
+    Requests go through one keep-alive Session, so repeated lookups reuse pooled
+    connections. With an OmdbCache attached, answers (including "not found") are served
+    from disk until they expire.
+
+    requests is only imported, and the Session only created, when the first lookup has
+    to go to the network, so commands that never look anything up do not load the HTTP stack.
+    """
+
+    API_KEY = "e88a7016"
+    BASE_URL = "http://www.omdbapi.com/"
+
+    def __init__(self, api_key=API_KEY, base_url=BASE_URL, timeout=10, cache=None, pool_size=16, metrics=None):
+        """
+        Initialize the OmdbClient instance.
+
+        Args:
+            api_key (str): The OMDb API key.
+            base_url (str): The API endpoint, e.g. a local stub in tests.
+            timeout (float): Seconds to wait for a response.
+            cache (OmdbCache): Optional response cache.
+            pool_size (int): Number of keep-alive connections kept in the pool.
+            metrics (Metrics): If given, records request latencies, cache hits and parse times.
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.cache = cache
+        self.metrics = metrics
+        self._pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    def _get_session(self):
+        """Returns the keep-alive Session, creating it on the first request."""
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    @staticmethod
+    def parse(data):
+        """
+        Converts an OMDb response body into a movie data dict, or None if the movie was not found.
+
+        The rating is None when OMDb has none ("N/A"), e.g. for unreleased titles; storages
+        keep such a movie with a rating of 0.
+        """
+        if data.get('Response') != "True":
+            return None
+        try:
+            rating = float(data["imdbRating"])
+        except (KeyError, TypeError, ValueError):
+            rating = None
+        imdb_link = f"https://www.imdb.com/title/{data.get('imdbID', 'N/A')}/"
+        country_code = get_country_code(data.get("Country", "").split(",")[0]) if data.get(
+            "Country") else None
+        return {
+            "title": data.get("Title", "N/A"),
+            "year": data.get("Year", "N/A"),
+            "rating": rating,
+            "poster": data.get("Poster", ""),
+            "imdb_link": imdb_link,
+            "country_code": country_code
+        }
+
+    def fetch(self, title=None, imdb_id=None, before_request=None, refresh=False):
+        """
+        Fetch a movie by title or IMDb ID.
+
+        Args:
+            title (str): The title to look up.
+            imdb_id (str): The IMDb ID to look up instead of the title.
+            before_request (callable): Called right before a network request, e.g. to wait
+                for a rate limiter. Cache hits do not call it.
+            refresh (bool): Skip the cache and always ask the API, storing the fresh answer in the cache.
+
+        Returns:
+            dict: The movie data, or None if OMDb does not know the movie.
+
+        Raises:
+            OmdbError: If the API answers with a status other than 200.
+            OmdbRequestError: If the request itself fails.
+        """
+        key = cache_key(title, imdb_id)
+        data = self.cache.get(key) if self.cache is not None and not refresh else None
+        if self.cache is not None and not refresh and self.metrics is not None:
+            self.metrics.inc('omdb_cache_lookups_total', result='miss' if data is None else 'hit')
+        if data is None:
+            if before_request is not None:
+                before_request()
+            params = {'apikey': self.api_key}
+            if imdb_id:
+                params['i'] = imdb_id
+            else:
+                params['t'] = title
+            status, data = self._request(params)
+            if status != 200:
+                raise OmdbError(status)
+            if self.cache is not None:
+                self.cache.put(key, data)
+        if self.metrics is None:
+            return self.parse(data)
+        # Parsing is timed on its own because it includes the lookup of the country code
+        with self.metrics.timer('omdb_parse_seconds'):
+            return self.parse(data)
+
+    def _request(self, params):
+        """
+        Sends one API request and returns its status code and, for 200, the decoded body.
+
+        The latency and status are recorded when metrics are enabled.
+        """
+        import requests
+
+        start = time.perf_counter()
+        status = 'error'
+        try:
+            response = self._get_session().get(self.base_url, params=params, timeout=self.timeout)
+            status = response.status_code
+            return status, response.json() if status == 200 else None
+        except requests.exceptions.RequestException as e:
+            raise OmdbRequestError(str(e)) from e
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe('omdb_request_seconds', time.perf_counter() - start, status=status)
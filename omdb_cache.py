@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+
+# The only error answer that is cached: other errors say nothing lasting about the title
+NOT_FOUND_ERROR = "Movie not found!"
+
+
+def cache_key(title=None, imdb_id=None):
+    """
+    Returns the cache key for a lookup.
+
+    IMDb IDs are lowercased, titles are case-folded with runs of whitespace collapsed, so
+    "The  Matrix" and "the matrix" share one entry.
+    """
+    if imdb_id:
+        return "i:" + imdb_id.strip().lower()
+    return "t:" + " ".join(title.split()).casefold()
+
+
+class OmdbCache:
+    """
+    Disk-backed cache of OMDb responses with a TTL and LRU eviction.
+
+    Responses are stored as the raw JSON body in an SQLite file. "Movie not found!"
+    answers are cached as well, with their own (usually shorter) TTL. Other error
+    answers (e.g. an invalid API key or the request limit) are not cached, so the
+    next lookup asks again. When the cache holds more than `max_entries` responses
+    the least recently used ones are evicted.
+    """
+
+    def __init__(self, file_path, ttl=7 * 24 * 3600, negative_ttl=24 * 3600, max_entries=100000):
+        """
+        Initialize the OmdbCache instance.
+
+        Args:
+            file_path (str): The path to the cache database.
+            ttl (float): Seconds a found movie stays valid.
+            negative_ttl (float): Seconds a "not found" answer stays valid.
+            max_entries (int): Maximum number of cached responses.
+        """
+        self.file_path = file_path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = None
+        self._entries = 0
+
+    @property
+    def _connection(self):
+        """The database connection, opened on first use. Callers hold the lock."""
+        if self._db is None:
+            import sqlite3  # loaded on the first lookup, so startup does not pay for it
+            connection = sqlite3.connect(self.file_path, check_same_thread=False)
+            with connection:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, body TEXT, expires REAL, last_used REAL)")
+                connection.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)")
+                self._entries = connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            self._db = connection
+        return self._db
+
+    def get(self, key):
+        """Returns the cached response body for a key, or None if it is missing or expired."""
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT body, expires FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] < now:
+                self.misses += 1
+                return None
+            self._connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, body):
+        """Stores a response body and evicts the least recently used entries over the size cap."""
+        if body.get('Response') == "True":
+            ttl = self.ttl
+        elif body.get('Error') == NOT_FOUND_ERROR:
+            ttl = self.negative_ttl
+        else:
+            return
+        now = time.time()
+        with self._lock, self._connection:
+            known = self._connection.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, body, expires, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(body), now + ttl, now))
+            if known is None:
+                self._entries += 1
+            if self._entries > self.max_entries:
+                self._entries -= self._connection.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                    (self._entries - self.max_entries,)).rowcount
+
+    def clear_expired(self):
+        """Removes every expired entry."""
+        with self._lock, self._connection:
+            self._entries -= self._connection.execute(
+                "DELETE FROM responses WHERE expires < ?", (time.time(),)).rowcount
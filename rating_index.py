@@ -0,0 +1,198 @@
+from bisect import bisect_left, bisect_right, insort
+from itertools import accumulate, islice
+
+BUCKET_SIZE = 512
+
+
+def _rating_of(details):
+    """Returns the rating of a movie as a float, treating unparsable values as 0."""
+    try:
+        return float(details.get('rating') or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class RatingIndex:
+    """
+    Movies kept ordered by rating, highest first and ties by title.
+
+    The order is held as a list of sorted buckets of (-rating, title) keys, each at most
+    2 * BUCKET_SIZE long. Adding or removing a movie bisects to its bucket and inserts
+    into that bucket only, so changes cost O(log n + BUCKET_SIZE) instead of a full sort.
+    Positions are found through the running bucket sizes, which gives rank and
+    position lookups, top-k and bottom-k in O(k), and rating ranges without a scan.
+
+    The index also keeps the sum of all ratings, so count, average, median, best and
+    worst need no pass over the library.
+    """
+
+    def __init__(self):
+        """Initialize an empty RatingIndex."""
+        self._buckets = []      # sorted lists of (-rating, title)
+        self._maxes = []        # last key of every bucket
+        self._offsets = None    # position of the first key of every bucket, rebuilt on demand
+        self._ratings = {}
+        self._total = 0.0
+
+    @classmethod
+    def from_movies(cls, movies):
+        """Builds an index from a dict (or dict-like view) of movies with one sort."""
+        index = cls()
+        index._ratings = {title: _rating_of(details) for title, details in movies.items()}
+        index._total = sum(index._ratings.values())
+        keys = sorted((-rating, title) for title, rating in index._ratings.items())
+        index._buckets = [keys[i:i + BUCKET_SIZE] for i in range(0, len(keys), BUCKET_SIZE)]
+        index._maxes = [bucket[-1] for bucket in index._buckets]
+        return index
+
+    def __len__(self):
+        return len(self._ratings)
+
+    def __contains__(self, title):
+        return title in self._ratings
+
+    def rating(self, title):
+        """Returns the indexed rating of a movie, or None if it is not indexed."""
+        return self._ratings.get(title)
+
+    def _positions(self):
+        """Returns the position of the first key of every bucket."""
+        if self._offsets is None:
+            self._offsets = [0, *accumulate(len(bucket) for bucket in self._buckets)]
+        return self._offsets
+
+    def _insert(self, key):
+        """Inserts a key into its bucket, splitting the bucket when it grows too large."""
+        self._offsets = None
+        if not self._buckets:
+            self._buckets.append([key])
+            self._maxes.append(key)
+            return
+        b = min(bisect_left(self._maxes, key), len(self._buckets) - 1)
+        bucket = self._buckets[b]
+        insort(bucket, key)
+        self._maxes[b] = bucket[-1]
+        if len(bucket) > 2 * BUCKET_SIZE:
+            self._buckets[b:b + 1] = [bucket[:BUCKET_SIZE], bucket[BUCKET_SIZE:]]
+            self._maxes[b:b + 1] = [bucket[BUCKET_SIZE - 1], bucket[-1]]
+
+    def _delete(self, key):
+        """Removes a key from its bucket, dropping the bucket when it becomes empty."""
+        self._offsets = None
+        b = bisect_left(self._maxes, key)
+        bucket = self._buckets[b]
+        del bucket[bisect_left(bucket, key)]
+        if bucket:
+            self._maxes[b] = bucket[-1]
+        else:
+            del self._buckets[b]
+            del self._maxes[b]
+
+    def add(self, title, details):
+        """Adds a movie, replacing the movie with the same title."""
+        self.update(title, _rating_of(details))
+
+    def update(self, title, rating):
+        """Sets the rating of a movie, adding it if it is not indexed yet."""
+        self.remove(title)
+        rating = float(rating)
+        self._ratings[title] = rating
+        self._total += rating
+        self._insert((-rating, title))
+
+    def remove(self, title):
+        """Removes a movie."""
+        rating = self._ratings.pop(title, None)
+        if rating is not None:
+            self._total -= rating
+            self._delete((-rating, title))
+
+    def rank(self, title):
+        """Returns the 0-based position of a movie in the highest-first order, or None."""
+        rating = self._ratings.get(title)
+        if rating is None:
+            return None
+        key = (-rating, title)
+        b = bisect_left(self._maxes, key)
+        return self._positions()[b] + bisect_left(self._buckets[b], key)
+
+    def _locate(self, position):
+        """Returns the bucket and the offset in it of a position."""
+        offsets = self._positions()
+        b = bisect_right(offsets, position) - 1
+        return b, position - offsets[b]
+
+    def at(self, position):
+        """Returns the (title, rating) at a position of the highest-first order."""
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        b, offset = self._locate(position)
+        rating, title = self._buckets[b][offset]
+        return title, -rating
+
+    def iterate(self, start=0, reverse=False):
+        """
+        Stream (title, rating) pairs from a position of the highest-first order on.
+
+        Args:
+            start (int): Number of movies to skip.
+            reverse (bool): Walk lowest first instead.
+        """
+        if start >= len(self):
+            return
+        if reverse:
+            b, offset = self._locate(len(self) - 1 - start)
+            for i in range(b, -1, -1):
+                bucket = self._buckets[i]
+                for j in range(offset if i == b else len(bucket) - 1, -1, -1):
+                    yield bucket[j][1], -bucket[j][0]
+        else:
+            b, offset = self._locate(start)
+            for i in range(b, len(self._buckets)):
+                for rating, title in islice(self._buckets[i], offset if i == b else 0, None):
+                    yield title, -rating
+
+    def top(self, k):
+        """Returns the k best rated (title, rating) pairs, best first."""
+        return list(islice(self.iterate(), k))
+
+    def bottom(self, k):
+        """Returns the k worst rated (title, rating) pairs, worst first."""
+        return list(islice(self.iterate(reverse=True), k))
+
+    def page(self, number, size):
+        """Returns the (title, rating) pairs of a 0-based page of the highest-first order."""
+        return list(islice(self.iterate(number * size), size))
+
+    def between(self, low, high):
+        """Returns the (title, rating) pairs rated from low to high inclusive, highest first."""
+        start = self._bound((-float(high), ''))
+        end = self._bound((-float(low), '\U0010ffff'))
+        return list(islice(self.iterate(start), max(end - start, 0)))
+
+    def _bound(self, key):
+        """Returns the position a key would be inserted at."""
+        b = bisect_left(self._maxes, key)
+        if b == len(self._buckets):
+            return len(self)
+        return self._positions()[b] + bisect_left(self._buckets[b], key)
+
+    def summary(self):
+        """
+        Return count, average, median, best and worst in the format of aggregate_stats,
+        with (title, rating) pairs for best and worst, or None if the index is empty.
+        """
+        count = len(self)
+        if not count:
+            return None
+        if count % 2 == 1:
+            median = self.at(count // 2)[1]
+        else:
+            median = (self.at(count // 2 - 1)[1] + self.at(count // 2)[1]) / 2
+        return {
+            'count': count,
+            'average': self._total / count,
+            'median': median,
+            'best': self.top(1)[0],
+            'worst': self.bottom(1)[0],
+        }
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from movie_app_project.omdb import OmdbError, OmdbRequestError
+
+IMDB_ID_IN_LINK = re.compile(r'(tt\d+)')
+
+
+class RatingRefresher:
+    """
+    Re-queries OMDb for every movie in the library and stores ratings that changed.
+    Lookups bypass the OMDb response cache and write the fresh answers back into it.
+
+    Lookups run concurrently on an asyncio event loop, limited by a semaphore. Movies are
+    processed in batches; the changed ratings of a batch are applied with one
+    update_many() call, and the finished titles are appended to a progress file. An
+    interrupted refresh started again with the same progress file skips the titles that
+    were already done. The progress file is removed once the whole library is refreshed.
+    Movies OMDb has no rating for ("N/A") keep their stored rating.
+    """
+
+    def __init__(self, storage, omdb, concurrency=8, batch_size=500, state_path=None):
+        """
+        Initialize the RatingRefresher instance.
+
+        Args:
+            storage (IStorage): The storage whose ratings are refreshed.
+            omdb (OmdbClient): The client used to look up movies.
+            concurrency (int): Maximum number of lookups in flight.
+            batch_size (int): Number of movies per write batch.
+            state_path (str): Progress file that makes the refresh resumable. None disables resuming.
+        """
+        self._storage = storage
+        self._omdb = omdb
+        self._concurrency = concurrency
+        self._batch_size = batch_size
+        self._state_path = state_path
+
+    def _load_progress(self):
+        """Returns the titles finished by an earlier, interrupted run and the changes it made."""
+        done, changes = set(), []
+        if not self._state_path or not os.path.exists(self._state_path):
+            return done, changes
+        with open(self._state_path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                done.add(entry['title'])
+                if entry['new'] != entry['old']:
+                    changes.append((entry['title'], entry['old'], entry['new']))
+        return done, changes
+
+    def _save_progress(self, results):
+        """
+        Appends the finished titles of a batch to the progress file.
+
+        Lookups that failed are left out, so a resumed run tries them again.
+        """
+        if not self._state_path:
+            return
+        with open(self._state_path, "a", encoding="utf-8") as file:
+            for title, old, new in results:
+                if new is None:
+                    continue
+                file.write(json.dumps({'title': title, 'old': old, 'new': new}) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _lookup(self, title, details):
+        """Fetches the current rating of a movie, by IMDb ID when the stored link has one."""
+        match = IMDB_ID_IN_LINK.search(details.get('imdb_link') or '')
+        try:
+            # Cached answers would hold the old rating, so every lookup goes to the API
+            if match:
+                movie_data = self._omdb.fetch(imdb_id=match.group(1), refresh=True)
+            else:
+                movie_data = self._omdb.fetch(title, refresh=True)
+        except (OmdbError, OmdbRequestError) as e:
+            print(f"Error refreshing '{title}': {e}")
+            return None
+        # OMDb has no rating for some titles ("N/A"), which must not overwrite the stored one
+        return movie_data['rating'] if movie_data else None
+
+    async def _refresh_batch(self, loop, semaphore, batch):
+        """Looks up a batch concurrently and returns (title, old rating, new rating) triples."""
+        async def refresh(title, details):
+            async with semaphore:
+                new = await loop.run_in_executor(None, self._lookup, title, details)
+            try:
+                old = float(details['rating'])
+            except (TypeError, ValueError):
+                old = 0.0
+            return title, old, new
+
+        return await asyncio.gather(*(refresh(title, details) for title, details in batch))
+
+    async def run(self):
+        """
+        Refresh the whole library.
+
+        Returns:
+            list: (title, old rating, new rating) for every movie whose rating changed.
+        """
+        done, changes = self._load_progress()
+        pending = [(title, details) for title, details in self._storage.list_movies().items()
+                   if title not in done]
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self._concurrency)
+        with ThreadPoolExecutor(max_workers=self._concurrency) as executor:
+            loop.set_default_executor(executor)
+            for start in range(0, len(pending), self._batch_size):
+                results = await self._refresh_batch(loop, semaphore, pending[start:start + self._batch_size])
+                batch_changes = [(title, old, new) for title, old, new in results
+                                 if new is not None and new != old]
+                self._storage.update_many({'title': title, 'rating': new} for title, _, new in batch_changes)
+                self._storage.flush()
+                self._save_progress(results)
+                changes.extend(batch_changes)
+        if self._state_path and os.path.exists(self._state_path):
+            os.remove(self._state_path)
+        return changes
@@ -0,0 +1,284 @@
+import json
+import os
+import unicodedata
+from array import array
+from movie_app_project.storage_file import atomic_open
+
+GRAM_SIZE = 3
+INDEX_VERSION = 1
+FUZZY_THRESHOLD = 0.3
+
+
+def normalize(text):
+    """Lowercases text, strips diacritics and collapses whitespace ("Amélie " -> "amelie")."""
+    decomposed = unicodedata.normalize('NFKD', str(text or ''))
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split())
+
+
+def grams(text):
+    """Returns the set of n-grams of already normalized text."""
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+def _padded(text):
+    """Pads normalized text with spaces so word starts and ends get their own n-grams."""
+    return f" {text} "
+
+
+class SearchIndex:
+    """
+    Inverted n-gram index over movie titles, and optionally notes.
+
+    Titles are normalized (case and diacritics folded) and split into overlapping
+    n-grams; every n-gram maps to the ids of the movies containing it. A substring query
+    only checks the movies that contain all n-grams of the query, and a fuzzy query ranks
+    movies by how many n-grams they share with it, which tolerates typos.
+
+    The index is kept current through add() and remove() and saved next to the storage
+    file together with the state (mtime and size) the storage files had when it was
+    last in step with them. sync() loads it on startup and only rebuilds it if the
+    library was changed by someone else in the meantime; called again later, it rebuilds
+    the index if another writer changed the library since. After writing a change to the
+    library and to the index, caught_up() records that the index covers the new state.
+
+    The saved file is one JSON line (version, signature, normalized texts, n-grams and
+    posting lengths) followed by all posting lists as one array of 32-bit ids, so loading
+    does not re-tokenize any title. Loaded posting lists stay arrays until they are changed.
+    """
+
+    def __init__(self, index_path, source_paths=(), include_notes=False):
+        """
+        Initialize an empty SearchIndex.
+
+        Args:
+            index_path (str): Where the index is saved.
+            source_paths (list): The storage files whose state decides whether a saved index is current.
+            include_notes (bool): Also match the notes of movies.
+        """
+        self.index_path = index_path
+        self.source_paths = list(source_paths)
+        self.include_notes = include_notes
+        self._signature = None  # state of the source files the index is in step with
+        self._clear()
+
+    def _clear(self):
+        """Empties the index."""
+        self._titles = []   # title of every id, None for ids freed by remove()
+        self._texts = []    # normalized (title, notes) of every id
+        self._ids = {}
+        self._free = []
+        self._postings = {}
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, title):
+        return title in self._ids
+
+    def _source_signature(self):
+        """Returns the mtime and size of every source file that exists."""
+        signature = []
+        for path in self.source_paths:
+            if os.path.exists(path):
+                stat = os.stat(path)
+                signature.append([path, stat.st_mtime_ns, stat.st_size])
+        return signature
+
+    def _load(self):
+        """Loads the saved index if it was built from the current source files, returns whether it was."""
+        try:
+            with open(self.index_path, "rb") as file:
+                meta = json.loads(file.readline())
+                if (meta.get('version') != INDEX_VERSION or meta.get('include_notes') != self.include_notes
+                        or meta.get('signature') != self._source_signature()):
+                    return False
+                ids = array('I')
+                ids.frombytes(file.read())
+        except (FileNotFoundError, ValueError):
+            return False
+        self._clear()
+        self._titles = [title for title, _, _ in meta['documents']]
+        self._texts = [(name, notes) for _, name, notes in meta['documents']]
+        self._ids = {title: i for i, title in enumerate(self._titles)}
+        start = 0
+        for gram, length in zip(meta['grams'], meta['lengths']):
+            self._postings[gram] = ids[start:start + length]
+            start += length
+        self._signature = meta['signature']
+        return True
+
+    def sync(self, list_movies):
+        """
+        Load the saved index, or rebuild it from the library if it is missing or stale.
+
+        Once synced, this only checks the source files and rebuilds the index if someone
+        else changed them since.
+
+        Args:
+            list_movies (callable): Returns the library as a dict-like mapping of title to details.
+
+        Returns:
+            bool: True if the index had to be rebuilt.
+        """
+        signature = self._source_signature()
+        if signature == self._signature or (self._signature is None and self._load()):
+            return False
+        self.rebuild(list_movies())
+        self._signature = signature
+        return True
+
+    def caught_up(self):
+        """Records that the source files only changed through changes that were also made to the index."""
+        signature = self._source_signature()
+        if signature != self._signature:
+            self._signature = signature
+            self._dirty = True
+
+    def rebuild(self, movies):
+        """Replaces the index contents with the given movies."""
+        self._clear()
+        for title, details in movies.items():
+            self.add(title, details)
+        self._dirty = True
+
+    def save(self):
+        """Writes the index next to the storage file if it changed since it was loaded."""
+        if not self._dirty:
+            return
+        # Number the movies densely again, dropping the ids freed by remove()
+        live = [i for i, title in enumerate(self._titles) if title is not None]
+        renumber = {old: new for new, old in enumerate(live)}
+        gram_list, lengths, ids = [], [], array('I')
+        for gram, posting in self._postings.items():
+            gram_list.append(gram)
+            lengths.append(len(posting))
+            ids.extend(sorted(renumber[i] for i in posting))
+        meta = {
+            'version': INDEX_VERSION,
+            'include_notes': self.include_notes,
+            'signature': self._signature,
+            'documents': [[self._titles[i], *self._texts[i]] for i in live],
+            'grams': gram_list,
+            'lengths': lengths,
+        }
+        with atomic_open(self.index_path, binary=True) as file:
+            file.write(json.dumps(meta, separators=(',', ':')).encode('utf-8') + b'\n')
+            file.write(ids.tobytes())
+        self._dirty = False
+
+    def _document_grams(self, texts):
+        """Returns the n-grams of all indexed texts of a movie."""
+        return set().union(*(grams(_padded(text)) for text in texts if text))
+
+    def _writable_posting(self, gram):
+        """Returns the posting set of a gram, turning a loaded array into a set first."""
+        posting = self._postings.get(gram)
+        if not isinstance(posting, set):
+            posting = self._postings[gram] = set(posting or ())
+        return posting
+
+    def add(self, title, details):
+        """Indexes a movie, replacing the entry of a movie with the same title."""
+        if title in self._ids:
+            self.remove(title)
+        texts = (normalize(title), normalize(details.get('notes')) if self.include_notes else '')
+        if self._free:
+            movie_id = self._free.pop()
+            self._titles[movie_id], self._texts[movie_id] = title, texts
+        else:
+            movie_id = len(self._titles)
+            self._titles.append(title)
+            self._texts.append(texts)
+        self._ids[title] = movie_id
+        for gram in self._document_grams(texts):
+            self._writable_posting(gram).add(movie_id)
+        self._dirty = True
+
+    def remove(self, title):
+        """Drops a movie from the index."""
+        movie_id = self._ids.pop(title, None)
+        if movie_id is None:
+            return
+        for gram in self._document_grams(self._texts[movie_id]):
+            posting = self._writable_posting(gram)
+            posting.discard(movie_id)
+            if not posting:
+                del self._postings[gram]
+        self._titles[movie_id], self._texts[movie_id] = None, ('', '')
+        self._free.append(movie_id)
+        self._dirty = True
+
+    def _candidates(self, query_grams):
+        """Returns the ids of the movies containing every one of the n-grams."""
+        postings = sorted((self._postings.get(gram, ()) for gram in query_grams), key=len)
+        if not postings:
+            return self._ids.values()
+        return set(postings[0]).intersection(*postings[1:])
+
+    def _rank(self, movie_id, query):
+        """Sort key of a substring match: exact, prefix, word start, anywhere in the title, notes."""
+        name = self._texts[movie_id][0]
+        if name == query:
+            rank = 0
+        elif name.startswith(query):
+            rank = 1
+        elif f" {query}" in name:
+            rank = 2
+        elif query in name:
+            rank = 3
+        else:
+            rank = 4
+        return rank, len(name), self._titles[movie_id]
+
+    def search(self, query, limit=None, prefix=False, fuzzy=False):
+        """
+        Return the titles matching a query, best matches first.
+
+        Args:
+            query (str): The text to look for; case and diacritics are ignored.
+            limit (int): Maximum number of titles to return, all matches if None.
+            prefix (bool): Only match titles starting with the query.
+            fuzzy (bool): If there are fewer than `limit` exact matches, fill up with
+                titles sharing enough n-grams with the query.
+
+        Returns:
+            list: Matching titles.
+        """
+        query = normalize(query)
+        if not query:
+            return []
+        if prefix:
+            matches = [movie_id for movie_id in self._candidates(grams(' ' + query))
+                       if self._texts[movie_id][0].startswith(query)]
+        else:
+            matches = [movie_id for movie_id in self._candidates(grams(query))
+                       if any(query in text for text in self._texts[movie_id])]
+        matches.sort(key=lambda movie_id: self._rank(movie_id, query))
+        if limit is not None:
+            matches = matches[:limit]
+        if fuzzy and (limit is None or len(matches) < limit):
+            found = set(matches)
+            matches += [movie_id for movie_id in self._fuzzy(query, limit) if movie_id not in found]
+            if limit is not None:
+                matches = matches[:limit]
+        return [self._titles[movie_id] for movie_id in matches]
+
+    def _fuzzy(self, query, limit):
+        """
+        Returns the ids of movies sharing enough n-grams with the query, ranked by the share
+        of the query's n-grams they contain and then by overall similarity.
+        """
+        query_grams = grams(_padded(query))
+        candidates = set().union(*(self._postings.get(gram, ()) for gram in query_grams))
+        scored = []
+        for movie_id in candidates:
+            name_grams = grams(_padded(self._texts[movie_id][0]))
+            common = len(query_grams & name_grams)
+            coverage = common / len(query_grams)
+            if coverage >= FUZZY_THRESHOLD:
+                similarity = common / (len(query_grams) + len(name_grams) - common)
+                scored.append((-coverage, -similarity, self._titles[movie_id], movie_id))
+        scored.sort()
+        return [movie_id for _, _, _, movie_id in scored[:limit]]
@@ -0,0 +1,190 @@
+import numpy as np
+
+PERCENTILES = (10, 25, 50, 75, 90)
+HISTOGRAM_BINS = 10
+
+
+def _year_of(details):
+    """Returns the first year of a movie as an int, or None if it has none."""
+    year = str(details.get('year') or '')[:4]
+    return int(year) if year.isascii() and year.isdigit() else None
+
+
+def _rating_of(details):
+    """Returns the rating of a movie as a float, treating unparsable values as 0."""
+    try:
+        return float(details.get('rating') or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class _GroupTotals:
+    """Running count and rating sum per group (year or country), kept in growable arrays."""
+
+    def __init__(self):
+        self.ids = {}
+        self.keys = []
+        self.count = np.zeros(16, dtype=np.int64)
+        self.total = np.zeros(16, dtype=np.float64)
+
+    def id_of(self, key):
+        """Returns the group id of a key, creating the group on first use."""
+        group = self.ids.get(key)
+        if group is None:
+            group = self.ids[key] = len(self.keys)
+            self.keys.append(key)
+            if group >= len(self.count):
+                self.count = np.resize(self.count, 2 * len(self.count))
+                self.total = np.resize(self.total, 2 * len(self.total))
+                self.count[group:] = 0
+                self.total[group:] = 0.0
+        return group
+
+    def change(self, group, count, rating):
+        """Adds (or with negative values removes) movies and their ratings to a group."""
+        self.count[group] += count
+        self.total[group] += rating
+
+    def load(self, groups, ratings):
+        """Sets the totals from a full array of group ids and the matching ratings."""
+        size = len(self.keys)
+        self.count[:size] = np.bincount(groups, minlength=size)
+        self.total[:size] = np.bincount(groups, weights=ratings, minlength=size)
+
+    def report(self):
+        """Returns {key: (count, average rating)} for every group that has movies."""
+        size = len(self.keys)
+        count, total = self.count[:size], self.total[:size]
+        present = np.flatnonzero(count)
+        averages = total[present] / count[present]
+        return {self.keys[i]: (int(count[i]), float(average)) for i, average in zip(present, averages)}
+
+
+class StatsEngine:
+    """
+    Rating statistics over the library kept in NumPy arrays.
+
+    Every movie occupies a slot in parallel rating, year and country arrays. Adding,
+    updating and deleting a movie touches only its slot and the running per-year and
+    per-country totals, so the engine stays current without recomputing. A report
+    (average, median, percentiles, histogram, best/worst and per-year/per-country
+    averages) is then a handful of vectorized passes over the arrays.
+    """
+
+    def __init__(self, capacity=1024):
+        """
+        Initialize an empty StatsEngine.
+
+        Args:
+            capacity (int): Initial number of slots, grown by doubling when needed.
+        """
+        self._ratings = np.zeros(capacity, dtype=np.float64)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._year_group = np.zeros(capacity, dtype=np.int32)
+        self._country_group = np.zeros(capacity, dtype=np.int32)
+        self._titles = []
+        self._slots = {}
+        self._free = []
+        self._years = _GroupTotals()
+        self._countries = _GroupTotals()
+
+    @classmethod
+    def from_movies(cls, movies):
+        """Builds an engine from a dict (or dict-like view) of movies, filling the arrays in bulk."""
+        items = list(movies.items())
+        size = len(items)
+        engine = cls(capacity=max(size, 1024))
+        engine._titles = [title for title, _ in items]
+        engine._slots = {title: slot for slot, title in enumerate(engine._titles)}
+        engine._ratings[:size] = np.fromiter((_rating_of(details) for _, details in items), np.float64, size)
+        engine._alive[:size] = True
+        engine._year_group[:size] = np.fromiter(
+            (engine._years.id_of(_year_of(details)) for _, details in items), np.int32, size)
+        engine._country_group[:size] = np.fromiter(
+            (engine._countries.id_of(details.get('country_code') or None) for _, details in items), np.int32, size)
+        engine._years.load(engine._year_group[:size], engine._ratings[:size])
+        engine._countries.load(engine._country_group[:size], engine._ratings[:size])
+        return engine
+
+    def __len__(self):
+        return len(self._slots)
+
+    def _grow(self):
+        """Doubles the capacity of the slot arrays."""
+        capacity = 2 * len(self._ratings)
+        for name in ('_ratings', '_alive', '_year_group', '_country_group'):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def add(self, title, details):
+        """Adds a movie, replacing a movie with the same title."""
+        if title in self._slots:
+            self.remove(title)
+        if self._free:
+            slot = self._free.pop()
+            self._titles[slot] = title
+        else:
+            slot = len(self._titles)
+            if slot >= len(self._ratings):
+                self._grow()
+            self._titles.append(title)
+        rating = _rating_of(details)
+        year_group = self._years.id_of(_year_of(details))
+        country_group = self._countries.id_of(details.get('country_code') or None)
+        self._slots[title] = slot
+        self._ratings[slot] = rating
+        self._alive[slot] = True
+        self._year_group[slot] = year_group
+        self._country_group[slot] = country_group
+        self._years.change(year_group, 1, rating)
+        self._countries.change(country_group, 1, rating)
+
+    def update(self, title, rating):
+        """Changes the rating of a movie."""
+        slot = self._slots.get(title)
+        if slot is None:
+            return
+        delta = float(rating) - self._ratings[slot]
+        self._ratings[slot] = float(rating)
+        self._years.change(self._year_group[slot], 0, delta)
+        self._countries.change(self._country_group[slot], 0, delta)
+
+    def remove(self, title):
+        """Removes a movie."""
+        slot = self._slots.pop(title, None)
+        if slot is None:
+            return
+        rating = self._ratings[slot]
+        self._years.change(self._year_group[slot], -1, -rating)
+        self._countries.change(self._country_group[slot], -1, -rating)
+        self._alive[slot] = False
+        self._titles[slot] = None
+        self._free.append(slot)
+
+    def report(self):
+        """
+        Return the statistics report, or None if the library is empty.
+
+        The result has 'count', 'average', 'median', 'percentiles' ({p: rating}),
+        'histogram' ([(low, high, count)] over 0-10), 'best' and 'worst' (titles),
+        'by_year' and 'by_country' ({key: (count, average rating)}).
+        """
+        if not self._slots:
+            return None
+        slots = np.flatnonzero(self._alive[:len(self._titles)])
+        ratings = self._ratings[slots]
+        percentiles = np.percentile(ratings, PERCENTILES)
+        counts, edges = np.histogram(ratings, bins=HISTOGRAM_BINS, range=(0.0, 10.0))
+        return {
+            'count': len(slots),
+            'average': float(ratings.mean()),
+            'median': float(np.median(ratings)),
+            'percentiles': {p: float(value) for p, value in zip(PERCENTILES, percentiles)},
+            'histogram': [(float(edges[i]), float(edges[i + 1]), int(counts[i])) for i in range(len(counts))],
+            'best': self._titles[slots[int(ratings.argmax())]],
+            'worst': self._titles[slots[int(ratings.argmin())]],
+            'by_year': self._years.report(),
+            'by_country': self._countries.report(),
+        }
@@ -0,0 +1,365 @@
+import heapq
+import mmap
+import os
+import random
+import struct
+from array import array
+from collections.abc import Mapping
+from movie_app_project.movie import Movie
+from movie_app_project.storage_file import FileStorage, StorageCorruptError, atomic_open
+
+MAGIC = b'MOVB'
+VERSION = 1
+NO_STRING = 0xFFFFFFFF
+NO_YEAR = -1
+
+# Column sections, in file order, with their array typecode. Columns are stored in native
+# byte order so they can be used straight from the memory map.
+SECTIONS = (
+    ('string_offsets', 'I'),  # string table: start of every string in the blob, plus the end
+    ('string_blob', 'B'),     # string table: UTF-8 bytes of all strings
+    ('title', 'I'),           # string index of every title
+    ('title_order', 'I'),     # row numbers sorted by title, for binary search
+    ('year', 'i'),            # numeric year, NO_YEAR when the year is not a plain number
+    ('year_text', 'I'),       # string index of years that are not plain numbers ("2011–2013")
+    ('rating', 'd'),
+    ('country', 'H'),         # 1-based index into country_table, 0 for no country
+    ('country_table', 'I'),   # string index of every distinct country code
+    ('poster', 'I'),          # string index of the prefix coded poster URL
+    ('imdb_link', 'I'),       # string index of the prefix coded IMDb URL
+    ('notes', 'I'),           # string index of the notes, NO_STRING when there are none
+)
+HEADER = struct.Struct('<4sHHI' + 'Q' * len(SECTIONS) * 2)
+
+# URLs are stored as one character naming a shared prefix, followed by the rest of the URL
+URL_PREFIXES = (
+    '',
+    'https://m.media-amazon.com/images/M/',
+    'https://www.imdb.com/title/',
+    'https://',
+    'http://',
+)
+
+
+def _encode_url(url):
+    """Replaces the longest known prefix of a URL by its one character code."""
+    url = url or ''
+    code = max(range(len(URL_PREFIXES)),
+               key=lambda c: len(URL_PREFIXES[c]) if url.startswith(URL_PREFIXES[c]) else -1)
+    return chr(code) + url[len(URL_PREFIXES[code]):]
+
+
+def _decode_url(value):
+    """Expands a prefix coded URL."""
+    return URL_PREFIXES[ord(value[0])] + value[1:]
+
+
+def encode_library(movies):
+    """Serializes a dict of movies into the columnar binary format."""
+    strings = {}
+
+    def intern(value):
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    countries = {}
+    columns = {name: array(typecode) for name, typecode in SECTIONS}
+    for title, details in movies.items():
+        columns['title'].append(intern(title))
+        year = str(details.get('year', ''))
+        if year.isascii() and year.isdigit() and len(year) < 10:
+            columns['year'].append(int(year))
+            columns['year_text'].append(NO_STRING if str(int(year)) == year else intern(year))
+        else:
+            columns['year'].append(NO_YEAR)
+            columns['year_text'].append(intern(year))
+        try:
+            columns['rating'].append(float(details.get('rating') or 0.0))
+        except ValueError:
+            columns['rating'].append(0.0)
+        country = details.get('country_code')
+        if country:
+            if country not in countries:
+                countries[country] = len(countries) + 1
+                columns['country_table'].append(intern(country))
+            columns['country'].append(countries[country])
+        else:
+            columns['country'].append(0)
+        columns['poster'].append(intern(_encode_url(details.get('poster'))))
+        columns['imdb_link'].append(intern(_encode_url(details.get('imdb_link'))))
+        notes = details.get('notes')
+        columns['notes'].append(intern(notes) if notes else NO_STRING)
+
+    blob = bytearray()
+    for value in strings:
+        columns['string_offsets'].append(len(blob))
+        blob += value.encode('utf-8')
+    columns['string_offsets'].append(len(blob))
+    columns['string_blob'] = array('B', blob)
+    titles = list(movies)
+    columns['title_order'] = array('I', sorted(range(len(titles)), key=titles.__getitem__))
+
+    sections = []
+    position = HEADER.size
+    for name, typecode in SECTIONS:
+        data = columns[name].tobytes()
+        padding = -position % 8
+        sections.append((position + padding, len(columns[name]), padding, data))
+        position += padding + len(data)
+    header = [MAGIC, VERSION, 0, len(titles)]
+    for offset, length, _, _ in sections:
+        header += [offset, length]
+    parts = [HEADER.pack(*header)]
+    for _, _, padding, data in sections:
+        parts.append(b'\0' * padding)
+        parts.append(data)
+    return b''.join(parts)
+
+
+class BinaryTable:
+    """
+    Read access to one version of a binary library file through a memory map.
+
+    Opening only parses the fixed-size header; columns are memoryviews over the map and
+    strings are decoded when a row is actually read.
+    """
+
+    def __init__(self, file_path):
+        with open(file_path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self._map)
+        try:
+            values = HEADER.unpack_from(buffer)
+        except struct.error as e:
+            raise StorageCorruptError(f"Storage file '{file_path}' is too short: {e}") from e
+        magic, version, _, self.count = values[:4]
+        if magic != MAGIC or version != VERSION:
+            raise StorageCorruptError(f"Storage file '{file_path}' is not a version {VERSION} binary library.")
+        for index, (name, typecode) in enumerate(SECTIONS):
+            offset, length = values[4 + 2 * index], values[5 + 2 * index]
+            size = array(typecode).itemsize
+            setattr(self, name, buffer[offset:offset + length * size].cast(typecode))
+
+    def string(self, index):
+        """Decodes a string from the string table."""
+        return str(self.string_blob[self.string_offsets[index]:self.string_offsets[index + 1]], 'utf-8')
+
+    def title_of(self, row):
+        """Returns the title of a row."""
+        return self.string(self.title[row])
+
+    def details(self, row):
+        """Decodes a row into a Movie."""
+        year_text = self.year_text[row]
+        country = self.country[row]
+        notes = self.notes[row]
+        return Movie(
+            year=self.string(year_text) if year_text != NO_STRING else str(self.year[row]),
+            rating=self.rating[row],
+            poster=_decode_url(self.string(self.poster[row])),
+            imdb_link=_decode_url(self.string(self.imdb_link[row])),
+            country_code=self.string(self.country_table[country - 1]) if country else None,
+            notes=self.string(notes) if notes != NO_STRING else None,
+        )
+
+    def find(self, title):
+        """Returns the row of a title by binary search over the title order, or -1."""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.title_of(self.title_order[middle]) < title:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self.title_of(self.title_order[low]) == title:
+            return self.title_order[low]
+        return -1
+
+    def item(self, row):
+        """Returns the (title, details) pair of a row."""
+        return self.title_of(row), self.details(row)
+
+
+class BinaryMovieView(Mapping):
+    """
+    Read-only dict-like view over a memory-mapped binary library.
+
+    Rows are decoded on access, so len(), lookups and statistics never parse the
+    whole file.
+    """
+
+    def __init__(self, table):
+        self._table = table
+
+    def __getitem__(self, title):
+        row = self._table.find(title)
+        if row < 0:
+            raise KeyError(title)
+        return self._table.details(row)
+
+    def __contains__(self, title):
+        return self._table.find(title) >= 0
+
+    def __iter__(self):
+        return (self._table.title_of(row) for row in range(self._table.count))
+
+    def __len__(self):
+        return self._table.count
+
+    def items(self):
+        """Streams (title, movie) pairs in file order."""
+        return (self._table.item(row) for row in range(self._table.count))
+
+    def values(self):
+        """Streams movie dicts in file order."""
+        return (self._table.details(row) for row in range(self._table.count))
+
+
+class StorageBinary(FileStorage):
+    """
+    IStorage interface implementation for storing movie data in a compact binary file.
+
+    Year, rating and country code are stored as typed columns, titles, URLs and notes in
+    a shared string table (URLs with their common prefixes replaced by a code), and an
+    index sorted by title allows binary search. Reads memory-map the file, so opening
+    the library and computing statistics do not parse it up front. Changes rewrite the
+    file atomically like the other file based storages.
+    """
+
+    def __init__(self, file_path, optimistic=False):
+        """
+        Initialize the StorageBinary instance.
+
+        Args:
+            file_path (str): The path to the binary library file.
+            optimistic (bool): Use optimistic instead of locked read-modify-write cycles.
+        """
+        super().__init__(file_path, optimistic=optimistic)
+        self._table = None
+        self._table_signature = None
+
+    def _current_table(self):
+        """Returns the mapped table, remapping it when the file was replaced and creating the file if missing."""
+        signature = self._file_signature()
+        if signature is None:
+            self._write_storage({})
+            signature = self._file_signature()
+        if self._table is None or signature != self._table_signature:
+            self._table = BinaryTable(self.file_path)
+            self._table_signature = signature
+        return self._table
+
+    def _read_storage(self):
+        """Decodes the whole binary file into a dictionary."""
+        if not os.path.exists(self.file_path):
+            return {}
+        table = self._current_table()
+        return dict(table.item(row) for row in range(table.count))
+
+    def _write_storage(self, data):
+        """Atomically replaces the binary file with the encoded data."""
+        encoded = encode_library(data)
+        with atomic_open(self.file_path, binary=True) as file:
+            file.write(encoded)
+
+    def list_movies(self):
+        """List all movies from storage as a lazy dict-like view over the memory map."""
+        if self._batch is not None:
+            return dict(self._batch)
+        return BinaryMovieView(self._current_table())
+
+    def get(self, title):
+        """
+        Return the details of a movie by its title using the sorted title index.
+        """
+        if self._batch is not None:
+            return self._batch.get(title)
+        table = self._current_table()
+        row = table.find(title)
+        return table.details(row) if row >= 0 else None
+
+    def get_many(self, titles):
+        """
+        Return the (title, details) pairs of the given titles that are in the file, using the sorted title index.
+        """
+        if self._batch is not None:
+            return super().get_many(titles)
+        table = self._current_table()
+        found = []
+        for title in titles:
+            row = table.find(title)
+            if row >= 0:
+                found.append((title, table.details(row)))
+        return found
+
+    def search(self, substring, limit=None):
+        """
+        Return (title, details) pairs whose title contains the substring, ignoring case.
+
+        Only titles are decoded while scanning; details are decoded for matches.
+        """
+        if self._batch is not None:
+            return super().search(substring, limit)
+        table = self._current_table()
+        term = substring.lower()
+        found = []
+        for row in range(table.count):
+            if term in table.title_of(row).lower():
+                found.append(table.item(row))
+                if limit is not None and len(found) >= limit:
+                    break
+        return found
+
+    def top_n(self, by='rating', n=None):
+        """
+        Return (title, details) pairs ordered by rating or year, highest first and ties by title.
+
+        Rows are ordered on the numeric column; only the returned rows are decoded.
+        """
+        if self._batch is not None:
+            return super().top_n(by, n)
+        table = self._current_table()
+        column = {'rating': table.rating, 'year': table.year}[by]
+
+        def key(row):
+            return -column[row], table.title_of(row)
+
+        rows = range(table.count)
+        ordered = sorted(rows, key=key) if n is None else heapq.nsmallest(n, rows, key=key)
+        return [table.item(row) for row in ordered]
+
+    def aggregate_stats(self):
+        """
+        Return rating statistics computed from the memory-mapped rating column.
+        """
+        if self._batch is not None:
+            return super().aggregate_stats()
+        table = self._current_table()
+        if not table.count:
+            return None
+        ratings = table.rating
+        ordered = sorted(ratings)
+        total = table.count
+        if total % 2 == 1:
+            median = ordered[total // 2]
+        else:
+            median = (ordered[total // 2 - 1] + ordered[total // 2]) / 2
+        rows = range(total)
+        return {
+            'count': total,
+            'average': sum(ratings) / total,
+            'median': median,
+            'best': table.item(max(rows, key=ratings.__getitem__)),
+            'worst': table.item(min(rows, key=ratings.__getitem__)),
+        }
+
+    def sample(self, k=1):
+        """
+        Return up to k distinct (title, details) pairs picked at random.
+        """
+        if self._batch is not None:
+            return super().sample(k)
+        table = self._current_table()
+        return [table.item(row) for row in random.sample(range(table.count), min(k, table.count))]
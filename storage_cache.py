@@ -0,0 +1,239 @@
+import atexit
+import os
+import threading
+from contextlib import contextmanager
+from movie_app_project.istorage import IStorage
+from movie_app_project.movie import Movie
+
+
+class CachedStorage(IStorage):
+    """
+    Write-back cache in front of a file based IStorage backend.
+
+    The library is loaded once and served from memory. Changes are kept in memory and
+    written back through the wrapped backend according to the flush policy. The file's
+    mtime and size are checked before every access, so changes made by another process
+    are picked up and pending local changes are replayed on top of them.
+    """
+
+    def __init__(self, backend, flush_every=None, flush_interval=None, flush_on_exit=True, metrics=None):
+        """
+        Initialize the CachedStorage instance.
+
+        Args:
+            backend (FileStorage): The file based storage to cache, e.g. StorageJson or StorageCsv.
+            flush_every (int): Flush after this many pending changes. None disables the check.
+            flush_interval (float): Flush this many seconds after the first pending change.
+                None disables the timer.
+            flush_on_exit (bool): Flush pending changes when the interpreter exits.
+            metrics (Metrics): If given, counts accesses served from memory and reloads of the file.
+        """
+        self._backend = backend
+        self.file_path = backend.file_path
+        self._flush_every = flush_every
+        self._flush_interval = flush_interval
+        self._metrics = metrics
+        self._movies = None
+        self._signature = None
+        self._pending = []
+        self._timer = None
+        self._batch_depth = 0
+        self._lock = threading.RLock()
+        if flush_on_exit:
+            atexit.register(self.flush)
+
+    def _file_signature(self):
+        """Returns the (mtime, size) pair used to detect changes made by other processes."""
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _ensure_fresh(self):
+        """Loads the library on first use and reloads it if the file changed on disk."""
+        signature = self._file_signature()
+        if self._movies is not None and signature == self._signature:
+            if self._metrics is not None:
+                self._metrics.inc('storage_cache_lookups_total', result='hit')
+            return
+        if self._metrics is not None:
+            self._metrics.inc('storage_cache_lookups_total', result='load')
+        self._movies = self._backend._read_storage()
+        self._signature = signature
+        for operation in self._pending:
+            self._apply(operation)
+
+    def _apply(self, operation):
+        """Applies a single pending change to the in-memory library."""
+        action, title, data = operation
+        if action == 'add':
+            self._movies[title] = Movie.from_dict(data)
+        elif action == 'delete':
+            self._movies.pop(title, None)
+        elif action == 'update' and title in self._movies:
+            self._movies[title]['rating'] = data['rating']
+            if data['notes'] is not None:
+                self._movies[title]['notes'] = data['notes']
+
+    def _record(self, *operations):
+        """Applies changes, queues them for write-back and flushes if the policy says so."""
+        for operation in operations:
+            self._apply(operation)
+            self._pending.append(operation)
+        if self._batch_depth == 0:
+            self._apply_flush_policy()
+
+    def _apply_flush_policy(self):
+        """Flushes or schedules a flush according to the flush policy."""
+        if not self._pending:
+            return
+        if self._flush_every is not None and len(self._pending) >= self._flush_every:
+            self.flush()
+        elif self._flush_interval is not None and self._timer is None:
+            self._timer = threading.Timer(self._flush_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    @contextmanager
+    def batch(self):
+        """
+        Apply the changes made inside the block as one write-back step.
+
+        The flush policy is only checked when the block ends. If the block raises, its
+        changes are dropped.
+        """
+        with self._lock:
+            start = len(self._pending)
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                del self._pending[start:]
+                self._movies = None
+                raise
+            finally:
+                self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._apply_flush_policy()
+
+    def flush(self):
+        """Writes pending changes back to the storage file."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            with self._backend._file_lock():
+                self._ensure_fresh()
+                self._backend._write_storage(self._movies)
+                self._signature = self._file_signature()
+            self._pending = []
+
+    def list_movies(self):
+        """List all movies from the in-memory library."""
+        with self._lock:
+            self._ensure_fresh()
+            return dict(self._movies)
+
+    def get(self, title):
+        """Return the details of a movie by its title straight from memory."""
+        with self._lock:
+            self._ensure_fresh()
+            details = self._movies.get(title)
+            return details.copy() if details is not None else None
+
+    def get_many(self, titles):
+        """Return the (title, details) pairs of the given titles straight from memory."""
+        with self._lock:
+            self._ensure_fresh()
+            return [(title, self._movies[title].copy()) for title in titles if title in self._movies]
+
+    def add_movie(self, title, year, rating, poster, imdb_link, country_code, notes=None):
+        """
+        Add a new movie to the in-memory library.
+        """
+        movie_data = {
+            'year': year,
+            'rating': rating,
+            'poster': poster,
+            'imdb_link': imdb_link,
+            'country_code': country_code,
+        }
+        if notes:
+            movie_data['notes'] = notes
+        with self._lock:
+            self._ensure_fresh()
+            self._record(('add', title, movie_data))
+
+    def add_many(self, movies):
+        """
+        Add several movies to the in-memory library as one write-back step.
+        """
+        operations = []
+        for movie in movies:
+            movie_data = {
+                'year': movie['year'],
+                'rating': movie['rating'],
+                'poster': movie['poster'],
+                'imdb_link': movie['imdb_link'],
+                'country_code': movie['country_code'],
+            }
+            if movie.get('notes'):
+                movie_data['notes'] = movie['notes']
+            operations.append(('add', movie['title'], movie_data))
+        with self._lock:
+            self._ensure_fresh()
+            self._record(*operations)
+
+    def delete_movie(self, title):
+        """
+        Delete a movie from the in-memory library by its title.
+        """
+        with self._lock:
+            self._ensure_fresh()
+            if title in self._movies:
+                self._record(('delete', title, None))
+            else:
+                print(f"Movie with title '{title}' not found in storage.")
+
+    def delete_many(self, titles):
+        """
+        Delete several movies from the in-memory library as one write-back step.
+        """
+        with self._lock:
+            self._ensure_fresh()
+            operations = []
+            for title in titles:
+                if title in self._movies:
+                    operations.append(('delete', title, None))
+                else:
+                    print(f"Movie with title '{title}' not found in storage.")
+            self._record(*operations)
+
+    def update_movie(self, title, rating, notes=None):
+        """
+        Update the rating of an existing movie in the in-memory library.
+        """
+        with self._lock:
+            self._ensure_fresh()
+            if title in self._movies:
+                self._record(('update', title, {'rating': rating, 'notes': notes}))
+            else:
+                print(f"Movie with title '{title}' not found in storage.")
+
+    def update_many(self, updates):
+        """
+        Update several movies in the in-memory library as one write-back step.
+        """
+        with self._lock:
+            self._ensure_fresh()
+            operations = []
+            for update in updates:
+                if update['title'] in self._movies:
+                    operations.append(('update', update['title'],
+                                       {'rating': update['rating'], 'notes': update.get('notes')}))
+                else:
+                    print(f"Movie with title '{update['title']}' not found in storage.")
+            self._record(*operations)
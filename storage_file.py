@@ -0,0 +1,307 @@
+import os
+import tempfile
+from abc import abstractmethod
+from contextlib import contextmanager, nullcontext
+from movie_app_project.istorage import IStorage
+from movie_app_project.movie import Movie
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
+
+
+class StorageCorruptError(Exception):
+    """
+    Raised when a storage file exists but cannot be parsed.
+    """
+
+
+class ConcurrentModificationError(Exception):
+    """
+    Raised in optimistic mode when the file kept changing under us for every retry.
+    """
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Hold an exclusive advisory lock on `path + ".lock"` for the duration of the block.
+
+    The lock lives on a sidecar file because the storage file itself is replaced on every
+    write, and a lock on a replaced file protects nothing.
+    """
+    with open(path + ".lock", "a+b") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def atomic_open(path, newline=None, binary=False):
+    """
+    Open a temporary file next to `path` for writing and move it over `path` on success.
+
+    The data is fsynced before the rename and the directory after it, so a crash leaves
+    either the old or the new file, never a truncated one. If the block raises, the
+    temporary file is removed and `path` is left untouched.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        os.chmod(temp_path, os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644)
+        with (os.fdopen(fd, "wb") if binary else os.fdopen(fd, "w", newline=newline)) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class FileStorage(IStorage):
+    """
+    Base class for storages that keep the whole library in a single file.
+
+    Subclasses provide `_read_storage()` and `_write_storage()`. Every change reads the
+    file, modifies the library and writes it back. Inside `batch()` the library is read
+    once when the block starts, all changes are applied to it in memory and it is
+    written once when the block ends.
+
+    Writes go through a temporary file and an atomic rename, so readers never see a
+    half-written file and need no lock. Writers coordinate through an advisory lock:
+    by default the lock is held from the read to the write. In optimistic mode the file
+    is read without the lock and only the write takes it; if the file changed in
+    between, the changes are replayed on the new contents and written again.
+    """
+
+    def __init__(self, file_path, optimistic=False, retries=10):
+        """
+        Initialize the FileStorage instance.
+
+        Args:
+            file_path (str): The path to the storage file.
+            optimistic (bool): Read without the lock and retry writes that lost a race.
+            retries (int): In optimistic mode, how often a write is retried.
+        """
+        self.file_path = file_path
+        self.optimistic = optimistic
+        self.retries = retries
+        self._batch = None
+        self._batch_changes = None
+        self._cached = None
+
+    @abstractmethod
+    def _read_storage(self):
+        """Reads the storage file and returns the movies as a dictionary."""
+        pass
+
+    @abstractmethod
+    def _write_storage(self, data):
+        """Writes the movies to the storage file."""
+        pass
+
+    def _file_lock(self):
+        """Returns a context manager holding the writer lock of the storage file."""
+        return file_lock(self.file_path)
+
+    def _file_signature(self):
+        """Returns what identifies the current version of the file: inode, mtime and size."""
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _commit(self, changes, movies=None, signature=None):
+        """
+        Applies changes to the library and writes it back.
+
+        Each change is a function that modifies the movies dict in place and returns
+        whether it changed anything. In optimistic mode `movies` and `signature` hand over
+        a library that a batch already read and changed.
+        """
+        if not self.optimistic:
+            with self._file_lock():
+                movies = self._read_storage()
+                if any([change(movies) for change in changes]):
+                    self._write_storage(movies)
+            return
+        for _ in range(self.retries + 1):
+            if movies is None:
+                signature = self._file_signature()
+                movies = self._read_storage()
+                if not any([change(movies) for change in changes]):
+                    return
+            with self._file_lock():
+                if self._file_signature() == signature:
+                    self._write_storage(movies)
+                    return
+            movies = None
+        raise ConcurrentModificationError(
+            f"'{self.file_path}' kept changing while writing, gave up after {self.retries} retries.")
+
+    def _mutate(self, change):
+        """Applies a change right away, or to the library being batched."""
+        if self._batch is None:
+            self._commit([change])
+        elif change(self._batch):
+            self._batch_changes.append(change)
+
+    @contextmanager
+    def batch(self):
+        """
+        Apply all changes made inside the block with one read and one write.
+
+        By default the writer lock is held for the whole block. In optimistic mode the
+        lock is only taken for the final write, and the block's changes are replayed on
+        the new contents if another writer got there first. If the block raises, its
+        changes are discarded and the file is left untouched.
+        """
+        if self._batch is not None:
+            yield self
+            return
+        with nullcontext() if self.optimistic else self._file_lock():
+            signature = self._file_signature()
+            self._batch, self._batch_changes = self._read_storage(), []
+            try:
+                yield self
+                movies, changes = self._batch, self._batch_changes
+            finally:
+                self._batch = self._batch_changes = None
+            if changes and not self.optimistic:
+                self._write_storage(movies)
+            elif changes:
+                self._commit(changes, movies, signature)
+
+    def _cached_movies(self):
+        """
+        Returns the library as last read, reading the file again only when it was replaced.
+
+        Writes always replace the file, so an unchanged signature means unchanged contents.
+        The returned dict is shared and must not be modified.
+        """
+        if self._batch is not None:
+            return self._batch
+        signature = self._file_signature()
+        cached = self._cached
+        if cached is None or cached[0] != signature:
+            cached = self._cached = signature, self._read_storage()
+        return cached[1]
+
+    def list_movies(self):
+        """List all movies from storage."""
+        if self._batch is not None:
+            return dict(self._batch)
+        return self._read_storage()
+
+    def get(self, title):
+        """Return the details of a movie by its title, parsing the file only if it changed since the last get."""
+        details = self._cached_movies().get(title)
+        return details.copy() if details is not None else None
+
+    def get_many(self, titles):
+        """Return the (title, details) pairs of the given titles that are in the file, in the given order."""
+        movies = self._cached_movies()
+        return [(title, movies[title].copy()) for title in titles if title in movies]
+
+    def add_movie(self, title, year, rating, poster, imdb_link, country_code, notes=None):
+        """
+        Add a new movie to the file.
+        Load existing movies and then save updated movie list.
+        """
+        self.add_many([{
+            'title': title,
+            'year': year,
+            'rating': rating,
+            'poster': poster,
+            'imdb_link': imdb_link,
+            'country_code': country_code,
+            'notes': notes,
+        }])
+
+    def add_many(self, movies):
+        """
+        Add several movies to the file with a single read and write.
+        """
+        records = {movie['title']: Movie.from_dict(movie) for movie in movies}
+
+        def change(stored):
+            for title, movie_data in records.items():
+                stored[title] = movie_data.copy()
+            return bool(records)
+
+        self._mutate(change)
+
+    def delete_movie(self, title):
+        """
+        Delete a movie from the file by its title.
+        """
+        self.delete_many([title])
+
+    def delete_many(self, titles):
+        """
+        Delete several movies from the file with a single read and write.
+        """
+        titles = list(titles)
+
+        def change(stored):
+            changed = False
+            for title in titles:
+                if title in stored:
+                    del stored[title]
+                    changed = True
+                else:
+                    print(f"Movie with title '{title}' not found in storage.")
+            return changed
+
+        self._mutate(change)
+
+    def update_movie(self, title, rating, notes=None):
+        """
+        Update the rating of an existing movie in the file.
+        """
+        self.update_many([{'title': title, 'rating': rating, 'notes': notes}])
+
+    def update_many(self, updates):
+        """
+        Update several movies in the file with a single read and write.
+        """
+        updates = list(updates)
+
+        def change(stored):
+            changed = False
+            for update in updates:
+                title = update['title']
+                if title in stored:
+                    stored[title]['rating'] = update['rating']
+                    if update.get('notes') is not None:
+                        stored[title]['notes'] = update['notes']
+                    changed = True
+                else:
+                    print(f"Movie with title '{title}' not found in storage.")
+            return changed
+
+        self._mutate(change)
@@ -0,0 +1,356 @@
+import json
+import os
+import threading
+from contextlib import contextmanager, nullcontext
+from movie_app_project.istorage import IStorage
+from movie_app_project.movie import Movie
+from movie_app_project.storage_file import file_lock
+
+
+class StorageJournal(IStorage):
+    """
+    IStorage interface implementation that appends every change to a journal.
+
+    The library lives in two files: a JSON snapshot at `file_path` and an append-only
+    log next to it (`file_path + ".log"`) with one JSON record per line. The first access
+    to the storage replays the log tail on top of the snapshot, so a change costs one
+    appended line instead of a rewrite of the whole library. Once the log grows past
+    `compact_after` records it is folded into a new snapshot in the background.
+
+    Several processes can share a journal. Appends, replays and compactions hold the
+    writer lock of the snapshot file (see file_lock()), and every access first applies
+    the records other processes appended since, or reloads both files if another process
+    compacted the journal. A batch holds the lock for the whole block.
+    """
+
+    def __init__(self, file_path, compact_after=1000, fsync=True):
+        """
+        Initialize the StorageJournal instance.
+
+        Args:
+            file_path (str): The path to the snapshot file.
+            compact_after (int): Number of log records that triggers a compaction.
+            fsync (bool): Force every appended record to disk before returning.
+        """
+        self.file_path = file_path
+        self.log_path = file_path + ".log"
+        self._compact_after = compact_after
+        self._fsync = fsync
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._compaction = None
+        self._batch = None
+        self._movies = None
+        self._seq = 0
+        self._log_records = 0
+        self._log_position = 0
+        self._log_seen = None
+        self._log = None
+
+    @contextmanager
+    def _locked(self):
+        """Holds the thread lock and the writer lock shared with other processes, reentrantly."""
+        with self._lock, (nullcontext() if self._lock_depth else file_lock(self.file_path)):
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+
+    def _log_state(self):
+        """Returns the inode and size of the log, None if there is no log."""
+        try:
+            stat = os.stat(self.log_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size
+
+    def _open(self):
+        """Loads the journal on first use and afterwards applies what other processes appended since."""
+        if self._log is not None and (self._lock_depth or self._log_state() == self._log_seen):
+            return
+        with self._locked():
+            self._sync()
+
+    def _sync(self):
+        """Brings the in-memory library up to date with the files. Callers hold _locked()."""
+        state = self._log_state()
+        if self._log is None or state is None or state[0] != self._log_seen[0] or state[1] < self._log_position:
+            # First use, or another process compacted the journal since it was read
+            self._reload()
+        else:
+            records, self._log_position = self._replay_log(self._log_position)
+            self._log_records += records
+            self._log_seen = self._log_state()
+
+    def _reload(self):
+        """Reads the snapshot and the whole log again and reopens the log for appending."""
+        self._movies, self._seq = self._read_snapshot()
+        if not os.path.exists(self.file_path):
+            self._write_snapshot({}, 0)
+        if self._log is not None:
+            self._log.close()
+        self._log = open(self.log_path, "a", encoding="utf-8")
+        self._log_records, self._log_position = self._replay_log(0)
+        self._log_seen = self._log_state()
+
+    def _read_snapshot(self):
+        """Reads the snapshot file and returns the movies and the last sequence number in it."""
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as file:
+                snapshot = json.load(file)
+        except FileNotFoundError:
+            return {}, 0
+        movies = {title: Movie.from_dict(details) for title, details in snapshot.get('movies', {}).items()}
+        return movies, snapshot.get('seq', 0)
+
+    def _write_snapshot(self, movies, seq):
+        """Atomically replaces the snapshot file with the given state."""
+        temp_path = self.file_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({'seq': seq, 'movies': movies}, file, default=dict)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.file_path)
+
+    def _replay_log(self, start):
+        """
+        Applies the log records from byte offset start on that are newer than the library
+        and returns how many records it read and the offset after the last complete one.
+
+        A torn last line left by a crash during an append is cut off, so later appends
+        start on a clean line. Callers hold _locked(), so no other writer is mid-append.
+        """
+        records = 0
+        valid_size = start
+        with open(self.log_path, "rb") as file:
+            file.seek(start)
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                valid_size += len(line)
+                records += 1
+                if record['seq'] > self._seq:
+                    self._apply(record)
+                    self._seq = record['seq']
+        if valid_size != os.path.getsize(self.log_path):
+            with open(self.log_path, "r+b") as file:
+                file.truncate(valid_size)
+        return records, valid_size
+
+    def _apply(self, record):
+        """Applies a single journal record to the in-memory library."""
+        title = record['title']
+        if record['op'] == 'add':
+            self._movies[title] = Movie.from_dict(record['data'])
+        elif record['op'] == 'delete':
+            self._movies.pop(title, None)
+        elif record['op'] == 'update' and title in self._movies:
+            self._movies[title]['rating'] = record['data']['rating']
+            if record['data']['notes'] is not None:
+                self._movies[title]['notes'] = record['data']['notes']
+
+    def _append(self, *changes):
+        """
+        Appends (op, title, data) records to the log in one write and applies them.
+
+        The records are numbered after the ones other processes appended. Inside a batch
+        the records are applied right away but only buffered for the log.
+        """
+        self._open()
+        with self._locked():
+            if self._batch is None:
+                self._sync()
+            records = []
+            for op, title, data in changes:
+                self._seq += 1
+                records.append({'seq': self._seq, 'op': op, 'title': title, 'data': data})
+            if self._batch is None:
+                self._write_records(records)
+            else:
+                self._batch.extend(records)
+            for record in records:
+                self._apply(record)
+
+    def _write_records(self, records):
+        """
+        Appends records to the log in one write and starts a compaction when the log is long.
+
+        Callers hold _locked() and have synced the library, so the log ends where it was read.
+        """
+        if not records:
+            return
+        self._log.write("".join(json.dumps(record) + "\n" for record in records))
+        self._log.flush()
+        if self._fsync:
+            os.fsync(self._log.fileno())
+        self._log_position = os.fstat(self._log.fileno()).st_size
+        self._log_seen = self._log_state()
+        self._log_records += len(records)
+        if self._log_records >= self._compact_after and self._compaction is None:
+            self._compaction = threading.Thread(target=self.compact, daemon=True)
+            self._compaction.start()
+
+    @contextmanager
+    def batch(self):
+        """
+        Append all changes made inside the block to the log in one write.
+
+        The writer lock is held for the whole block, so other processes wait for it. If the
+        block raises, nothing is written and the in-memory library is rebuilt from the files.
+        """
+        self._open()
+        with self._locked():
+            if self._batch is not None:
+                yield self
+                return
+            self._sync()
+            self._batch = []
+            try:
+                yield self
+                records = self._batch
+            except BaseException:
+                self._batch = None
+                self._reload()
+                raise
+            finally:
+                self._batch = None
+            self._write_records(records)
+
+    def compact(self):
+        """
+        Fold the log into a new snapshot.
+
+        Runs under the writer lock, so other processes cannot append while the snapshot is
+        written. The log is then replaced by an empty one, which tells other processes to
+        reload both files.
+        """
+        self._open()
+        with self._locked():
+            try:
+                self._sync()
+                self._write_snapshot(self._movies, self._seq)
+                self._log.close()
+                temp_path = self.log_path + ".tmp"
+                with open(temp_path, "w", encoding="utf-8") as target:
+                    os.fsync(target.fileno())
+                os.replace(temp_path, self.log_path)
+                self._log = open(self.log_path, "a", encoding="utf-8")
+                self._log_records = 0
+                self._log_position = 0
+                self._log_seen = self._log_state()
+            finally:
+                self._compaction = None
+
+    def flush(self):
+        """Wait for a running compaction to finish. Records are durable once appended."""
+        compaction = self._compaction
+        if compaction is not None:
+            compaction.join()
+
+    def list_movies(self):
+        """List all movies from storage."""
+        self._open()
+        with self._lock:
+            return {title: details.copy() for title, details in self._movies.items()}
+
+    def get(self, title):
+        """Return the details of a movie by its title straight from memory."""
+        self._open()
+        with self._lock:
+            details = self._movies.get(title)
+            return details.copy() if details is not None else None
+
+    def get_many(self, titles):
+        """Return the (title, details) pairs of the given titles straight from memory."""
+        self._open()
+        with self._lock:
+            return [(title, self._movies[title].copy()) for title in titles if title in self._movies]
+
+    def add_movie(self, title, year, rating, poster, imdb_link, country_code, notes=None):
+        """
+        Add a new movie by appending an 'add' record to the journal.
+        """
+        movie_data = {
+            'year': year,
+            'rating': rating,
+            'poster': poster,
+            'imdb_link': imdb_link,
+            'country_code': country_code,
+        }
+        if notes:
+            movie_data['notes'] = notes
+        self._append(('add', title, movie_data))
+
+    def add_many(self, movies):
+        """
+        Add several movies with a single append to the journal.
+        """
+        changes = []
+        for movie in movies:
+            movie_data = {
+                'year': movie['year'],
+                'rating': movie['rating'],
+                'poster': movie['poster'],
+                'imdb_link': movie['imdb_link'],
+                'country_code': movie['country_code'],
+            }
+            if movie.get('notes'):
+                movie_data['notes'] = movie['notes']
+            changes.append(('add', movie['title'], movie_data))
+        self._append(*changes)
+
+    def delete_movie(self, title):
+        """
+        Delete a movie by appending a 'delete' record to the journal.
+        """
+        self._open()
+        if title in self._movies:
+            self._append(('delete', title, None))
+        else:
+            print(f"Movie with title '{title}' not found in storage.")
+
+    def delete_many(self, titles):
+        """
+        Delete several movies with a single append to the journal.
+        """
+        self._open()
+        with self._lock:
+            changes = []
+            deleted = set()
+            for title in titles:
+                if title in self._movies and title not in deleted:
+                    changes.append(('delete', title, None))
+                    deleted.add(title)
+                else:
+                    print(f"Movie with title '{title}' not found in storage.")
+            self._append(*changes)
+
+    def update_movie(self, title, rating, notes=None):
+        """
+        Update the rating of an existing movie by appending an 'update' record to the journal.
+        """
+        self._open()
+        if title in self._movies:
+            self._append(('update', title, {'rating': rating, 'notes': notes}))
+        else:
+            print(f"Movie with title '{title}' not found in storage.")
+
+    def update_many(self, updates):
+        """
+        Update several movies with a single append to the journal.
+        """
+        self._open()
+        with self._lock:
+            changes = []
+            for update in updates:
+                if update['title'] in self._movies:
+                    changes.append(('update', update['title'],
+                                    {'rating': update['rating'], 'notes': update.get('notes')}))
+                else:
+                    print(f"Movie with title '{update['title']}' not found in storage.")
+            self._append(*changes)
@@ -1,85 +1,35 @@
 import json
-import os
-from istorage import IStorage
+from movie_app_project.movie import Movie
+from movie_app_project.storage_file import FileStorage, StorageCorruptError, atomic_open
 
 
-class StorageJson(IStorage):
+class StorageJson(FileStorage):
     """
     IStorage interface implementation for storing movie data.
     """
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, optimistic=False):
         """
         Initialize the StorageJson instance.
 
         Args:
             file_path (str): The path to the JSON file.
+            optimistic (bool): Use optimistic instead of locked read-modify-write cycles.
         """
-        self.file_path = file_path
-        if not os.path.exists(self.file_path):
-            with open(self.file_path, "w") as handle:
-                json.dump({}, handle)
+        super().__init__(file_path, optimistic=optimistic)
 
     def _read_storage(self):
         """Reads the JSON storage file and returns the data."""
         try:
             with open(self.file_path, "r") as file:
-                return json.load(file)
-        except (FileNotFoundError, json.JSONDecodeError):
+                movies = json.load(file)
+        except FileNotFoundError:
             return {}
+        except json.JSONDecodeError as e:
+            raise StorageCorruptError(f"Storage file '{self.file_path}' is not valid JSON: {e}") from e
+        return {title: Movie.from_dict(details) for title, details in movies.items()}
 
     def _write_storage(self, data):
-        """Writes data to the JSON storage file."""
-        with open(self.file_path, "w") as file:
-            json.dump(data, file, indent=4)
-
-    def list_movies(self):
-        """List all movies from storage."""
-        return self._read_storage()
-
-    def add_movie(self, title, year, rating, poster, imdb_link, country_code, notes=None):
-        """
-        Add a new movie to the JSON file.
-        Load existing movies and then save updated movie list to JSON.
-        """
-        movies = self._read_storage()
-        movie_data = {
-            'year': year,
-            'rating': rating,
-            'poster': poster,
-            'imdb_link': imdb_link,
-            'country_code': country_code,
-        }
-        if notes:
-            movie_data['notes'] = notes
-        movies[title] = movie_data
-        self._write_storage(movies)
-
-    def delete_movie(self, title):
-        """
-        Delete a movie from the JSON file by its title.
-        """
-        movies = self._read_storage()  # load existing movies
-
-        if title in movies:
-            del movies[title]
-            self._write_storage(movies)
-
-        else:
-            print(f"Movie with title '{title}' not found in storage.")
-
-    def update_movie(self, title, rating, notes=None):
-        """
-        Update the rating of an existing movie in the JSON file.
-        """
-        movies = self._read_storage()
-
-        if title in movies:
-            movies[title]['rating'] = rating
-
-            if notes is not None:
-                movies[title]['notes'] = notes
-            self._write_storage(movies)
-
-        else:
-            print(f"Movie with title '{title}' not found in storage.")
+        """Atomically replaces the JSON storage file with the data."""
+        with atomic_open(self.file_path) as file:
+            json.dump(data, file, indent=4, default=dict)
@@ -0,0 +1,420 @@
+import heapq
+import os
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager, ExitStack
+from itertools import chain
+from movie_app_project.istorage import IStorage, _as_number
+from movie_app_project.storage_binary import StorageBinary
+from movie_app_project.storage_csv import StorageCsv
+from movie_app_project.storage_journal import StorageJournal
+from movie_app_project.storage_json import StorageJson
+from movie_app_project.storage_sqlite import StorageSqlite
+
+# Parsing the whole file dominates a query on these, so their shards are queried in worker
+# processes. The other backends answer from memory or an index and are queried in this process.
+POOLED_EXTENSIONS = ('.json', '.csv')
+
+# Cached partial results kept per shard, e.g. one per search term
+PARTIALS_PER_SHARD = 64
+
+# Cache key of the set of titles in a shard, which routes changes to the shards holding a title
+TITLES_KEY = ('titles', ())
+
+# Worker process side: path -> (signature, storage) of the shards it has opened
+_worker_storages = {}
+
+
+def open_storage(file_path, optimistic=False):
+    """
+    Open a library file with the backend its extension names.
+
+    Args:
+        file_path (str): A .json, .csv, .journal, .db, .sqlite or .mvb file.
+        optimistic (bool): Passed on to the JSON, CSV and binary backends.
+
+    Returns:
+        IStorage: The opened storage.
+
+    Raises:
+        ValueError: If the extension names no backend.
+    """
+    if file_path.endswith('.json'):
+        return StorageJson(file_path, optimistic=optimistic)
+    if file_path.endswith('.csv'):
+        return StorageCsv(file_path, optimistic=optimistic)
+    if file_path.endswith('.journal'):
+        return StorageJournal(file_path)
+    if file_path.endswith(('.db', '.sqlite')):
+        return StorageSqlite(file_path)
+    if file_path.endswith('.mvb'):
+        return StorageBinary(file_path, optimistic=optimistic)
+    raise ValueError(f"Invalid file type '{file_path}'. Please provide a .json, .csv, .journal, .db, .sqlite "
+                     f"or .mvb file.")
+
+
+def shard_signature(file_path):
+    """Returns the inode, mtime and size of a shard's file and of its journal log and SQLite WAL."""
+    signature = []
+    for path in (file_path, file_path + '.log', file_path + '-wal'):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            signature.append(None)
+            continue
+        signature.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def _partial_stats(storage):
+    """
+    Returns the mergeable rating statistics of one shard: the number of movies, the sum of
+    their ratings, how often each rating occurs (for the median) and the best and worst movie.
+    """
+    counts = Counter()
+    best = worst = None
+    for title, details in storage.list_movies().items():
+        rating = _as_number(details['rating'])
+        counts[rating] += 1
+        if best is None or rating > _as_number(best[1]['rating']):
+            best = (title, details)
+        if worst is None or rating < _as_number(worst[1]['rating']):
+            worst = (title, details)
+    return {'count': sum(counts.values()), 'sum': sum(rating * count for rating, count in counts.items()),
+            'counts': counts, 'best': best, 'worst': worst}
+
+
+def query_shard(storage, operation, args):
+    """
+    Compute one shard's partial result of a query.
+
+    Args:
+        storage (IStorage): The shard.
+        operation (str): 'search', 'top_n', 'stats' or 'titles'.
+        args (tuple): The arguments of the storage method, (substring, limit) or (by, n).
+
+    Returns:
+        The shard's search matches, its movies ordered like top_n(), its partial statistics
+        or the set of its titles.
+    """
+    if operation == 'stats':
+        return _partial_stats(storage)
+    if operation == 'titles':
+        return frozenset(storage.list_movies())
+    if operation == 'top_n' and args[0] != 'rating':
+        # Backends order years differently (the binary one puts non-numeric years at -1, SQLite
+        # compares the text), so other fields are ranked with the IStorage key on every shard
+        return IStorage.top_n(storage, *args)
+    return getattr(storage, operation)(*args)
+
+
+def _query_in_worker(file_path, signature, operation, args):
+    """Runs query_shard() in a worker process, reopening the shard only when its files changed."""
+    opened = _worker_storages.get(file_path)
+    if opened is None or opened[0] != signature:
+        opened = _worker_storages[file_path] = (signature, open_storage(file_path))
+    return query_shard(opened[1], operation, args)
+
+
+def merge_stats(partials):
+    """
+    Combine the partial statistics of several shards into the aggregate_stats() result.
+
+    Returns:
+        dict: 'count', 'average', 'median', 'best' and 'worst', or None if every shard is empty.
+    """
+    partials = [partial for partial in partials if partial['count']]
+    if not partials:
+        return None
+    counts = Counter()
+    for partial in partials:
+        counts.update(partial['counts'])
+    total = sum(partial['count'] for partial in partials)
+
+    # The median is the middle rating (or the mean of the two middle ones) of the merged counts
+    middle = [(total - 1) // 2, total // 2]
+    median, seen = [], 0
+    for rating in sorted(counts):
+        seen += counts[rating]
+        while middle and middle[0] < seen:
+            median.append(rating)
+            middle.pop(0)
+    return {
+        'count': total,
+        'average': sum(partial['sum'] for partial in partials) / total,
+        'median': sum(median) / 2,
+        'best': max((partial['best'] for partial in partials), key=lambda x: _as_number(x[1]['rating'])),
+        'worst': min((partial['worst'] for partial in partials), key=lambda x: _as_number(x[1]['rating'])),
+    }
+
+
+class ShardedStorage(IStorage):
+    """
+    IStorage that mounts several library files as shards of one logical library.
+
+    Each shard is a file any backend can open, e.g. one library per user ("john.json",
+    "sara.csv"). search, top_n and aggregate_stats fan out to the shards and merge what
+    they return: search matches are concatenated in shard order, the top n of every
+    shard are ranked again with one key and the statistics are combined from per-shard
+    partial aggregates. JSON and CSV shards are parsed in a process pool, one shard per
+    task. close() shuts the pool down.
+
+    Every partial result is cached with the signature (inode, mtime and size) of the
+    shard's files, so a query only recomputes the shards that changed since it last ran
+    and answers the others from the cache. The set of titles in every shard is cached
+    the same way and kept current by the changes made through this storage, so a change
+    is routed to its shard without reading the library again.
+
+    Queries report the movies of every shard, so a title kept in two libraries is found,
+    ranked and counted twice. list_movies() and get() return one movie per title, the one
+    from the first shard holding it. Changes go to the shards holding the title (update
+    the first one, delete all of them); new movies go to the write shard.
+    """
+
+    def __init__(self, file_paths, write_shard=0, workers=None, optimistic=False):
+        """
+        Initialize the ShardedStorage.
+
+        Args:
+            file_paths (list): The library files to mount, in order of precedence.
+            write_shard (int): Index of the shard that new movies are added to.
+            workers (int): Size of the process pool. 1 queries every shard in this process,
+                None uses one process per CPU (and no pool on a single CPU).
+            optimistic (bool): Passed on to the JSON, CSV and binary backends.
+
+        Raises:
+            ValueError: If no file is given or a file has an unknown extension.
+        """
+        if not file_paths:
+            raise ValueError("ShardedStorage needs at least one library file.")
+        self.file_paths = list(file_paths)
+        self._shards = [open_storage(path, optimistic=optimistic) for path in self.file_paths]
+        self._write_shard = write_shard
+        self._workers = workers
+        self._pool = None
+        self._lock = threading.RLock()
+        self._partials = [OrderedDict() for _ in self._shards]
+        self._batch_depth = 0
+
+    def close(self):
+        """Shuts the process pool down."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _executor(self):
+        """Returns the process pool, started on first use."""
+        if self._pool is None:
+            from concurrent.futures import ProcessPoolExecutor  # loads multiprocessing, so only when queried
+            self._pool = ProcessPoolExecutor(max_workers=self._workers)
+        return self._pool
+
+    def _forget(self, indexes):
+        """Drops the cached partial results of shards changed through this storage."""
+        with self._lock:
+            for index in indexes:
+                self._partials[index].clear()
+
+    def _written(self, index, added=(), removed=()):
+        """
+        Drops the cached partial results of a shard changed through this storage, but keeps
+        its cached title set current, so the next change is routed without reading the shard.
+        """
+        with self._lock:
+            partials = self._partials[index]
+            cached = partials.get(TITLES_KEY)
+            partials.clear()
+            if cached is not None and not self._batch_depth:
+                titles = (cached[1] | frozenset(added)) - frozenset(removed)
+                partials[TITLES_KEY] = (shard_signature(self.file_paths[index]), titles)
+
+    def _fan_out(self, operation, args=()):
+        """Returns the partial result of every shard, from the cache if the shard is unchanged."""
+        # Inside a batch the pending changes are not in the files yet, so every shard is asked directly
+        if self._batch_depth:
+            return [query_shard(shard, operation, args) for shard in self._shards]
+
+        key = (operation, args)
+        results = [None] * len(self._shards)
+        stale = []
+        with self._lock:
+            for index, path in enumerate(self.file_paths):
+                signature = shard_signature(path)
+                cached = self._partials[index].get(key)
+                if cached is not None and cached[0] == signature:
+                    self._partials[index].move_to_end(key)
+                    results[index] = cached[1]
+                else:
+                    stale.append((index, signature))
+
+        pooled = [(index, signature) for index, signature in stale
+                  if self.file_paths[index].endswith(POOLED_EXTENSIONS)]
+        if (self._workers or os.cpu_count() or 1) < 2 or len(pooled) < 2:
+            pooled = []
+        futures = [(index, signature, self._executor().submit(
+            _query_in_worker, self.file_paths[index], signature, operation, args)) for index, signature in pooled]
+        computed = [(index, signature, query_shard(self._shards[index], operation, args))
+                    for index, signature in stale if (index, signature) not in pooled]
+        computed += [(index, signature, future.result()) for index, signature, future in futures]
+
+        with self._lock:
+            for index, signature, result in computed:
+                results[index] = result
+                partials = self._partials[index]
+                partials[key] = (signature, result)
+                if len(partials) > PARTIALS_PER_SHARD:
+                    partials.popitem(last=False)
+        return results
+
+    def _holders(self, titles):
+        """Returns title -> indexes of the shards holding it, for the given titles."""
+        directory = self._fan_out(*TITLES_KEY)
+        holders = {}
+        for title in set(titles):
+            indexes = [index for index, shard_titles in enumerate(directory) if title in shard_titles]
+            if indexes:
+                holders[title] = indexes
+        return holders
+
+    @contextmanager
+    def batch(self):
+        """Runs the block in a batch of every shard."""
+        try:
+            with ExitStack() as stack:
+                for shard in self._shards:
+                    stack.enter_context(shard.batch())
+                self._batch_depth += 1
+                try:
+                    yield self
+                finally:
+                    self._batch_depth -= 1
+        finally:
+            self._forget(range(len(self._shards)))
+
+    def flush(self):
+        """Flush every shard."""
+        for shard in self._shards:
+            shard.flush()
+
+    def list_movies(self):
+        """
+        Return the movies of all shards, one per title from the first shard holding it.
+        """
+        movies = {}
+        for shard in reversed(self._shards):
+            movies.update(shard.list_movies())
+        return movies
+
+    def add_movie(self, title, year, rating, poster, imdb_link, country_code, notes=None):
+        """
+        Add a movie to the write shard, or replace it in the shard already holding the title.
+        """
+        self.add_many([{'title': title, 'year': year, 'rating': rating, 'poster': poster,
+                        'imdb_link': imdb_link, 'country_code': country_code, 'notes': notes}])
+
+    def add_many(self, movies):
+        """
+        Add several movies, each to the shard already holding its title or else to the write shard.
+        """
+        movies = list(movies)
+        holders = self._holders(movie['title'] for movie in movies)
+        by_shard = {}
+        for movie in movies:
+            index = holders.get(movie['title'], [self._write_shard])[0]
+            by_shard.setdefault(index, []).append(movie)
+        for index, shard_movies in by_shard.items():
+            self._shards[index].add_many(shard_movies)
+            self._written(index, added=[movie['title'] for movie in shard_movies])
+
+    def delete_movie(self, title):
+        """
+        Delete a movie from every shard holding it.
+        """
+        self.delete_many([title])
+
+    def delete_many(self, titles):
+        """
+        Delete several movies from every shard holding them.
+        """
+        titles = list(titles)
+        holders = self._holders(titles)
+        by_shard = {}
+        for title in titles:
+            if title not in holders:
+                print(f"Movie with title '{title}' not found in storage.")
+            for index in holders.get(title, []):
+                by_shard.setdefault(index, []).append(title)
+        for index, shard_titles in by_shard.items():
+            self._shards[index].delete_many(shard_titles)
+            self._written(index, removed=shard_titles)
+
+    def update_movie(self, title, rating, notes=None):
+        """
+        Update a movie in the first shard holding it.
+        """
+        self.update_many([{'title': title, 'rating': rating, 'notes': notes}])
+
+    def update_many(self, updates):
+        """
+        Update several movies, each in the first shard holding it.
+        """
+        updates = list(updates)
+        holders = self._holders(update['title'] for update in updates)
+        by_shard = {}
+        for update in updates:
+            if update['title'] not in holders:
+                print(f"Movie with title '{update['title']}' not found in storage.")
+                continue
+            by_shard.setdefault(holders[update['title']][0], []).append(update)
+        for index, shard_updates in by_shard.items():
+            self._shards[index].update_many(shard_updates)
+            self._written(index)
+
+    def get(self, title):
+        """
+        Return the details of a movie from the first shard holding it, or None.
+        """
+        for shard in self._shards:
+            details = shard.get(title)
+            if details is not None:
+                return details
+        return None
+
+    def get_many(self, titles):
+        """
+        Return the (title, details) pairs of the given titles, each from the first shard holding it.
+        """
+        titles = list(titles)
+        found = {}
+        for shard in self._shards:
+            missing = [title for title in titles if title not in found]
+            if not missing:
+                break
+            found.update(shard.get_many(missing))
+        return [(title, found[title]) for title in titles if title in found]
+
+    def search(self, substring, limit=None):
+        """
+        Return the (title, details) pairs of every shard whose title contains the substring, in shard order.
+        """
+        found = [item for partial in self._fan_out('search', (substring, limit)) for item in partial]
+        return found if limit is None else found[:limit]
+
+    def top_n(self, by='rating', n=None):
+        """
+        Return the movies of every shard ordered by rating or year, highest first and ties by title.
+
+        Each shard returns its own top n and the candidates are ranked again with the IStorage
+        key, since backends do not all order a field the same way.
+        """
+        def key(item):
+            return -_as_number(item[1][by]), item[0]
+
+        candidates = chain.from_iterable(self._fan_out('top_n', (by, n)))
+        return sorted(candidates, key=key) if n is None else heapq.nsmallest(n, candidates, key=key)
+
+    def aggregate_stats(self):
+        """
+        Return the rating statistics of all shards together, or None if they are empty.
+        """
+        return merge_stats(self._fan_out('stats'))
@@ -0,0 +1,292 @@
+import random
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager
+from movie_app_project.istorage import IStorage
+from movie_app_project.movie import Movie
+
+SELECT_MOVIE = "SELECT title, year, rating, poster, imdb_link, country_code, notes FROM movies"
+SORTABLE_COLUMNS = ("rating", "year")
+
+# Titles looked up per query by get_many(), below SQLite's default limit of 999 parameters
+TITLES_PER_QUERY = 500
+
+
+def _row_to_movie(row):
+    """Converts a (year, rating, poster, imdb_link, country_code, notes) row into a Movie."""
+    return Movie(*row)
+
+
+def _to_items(rows):
+    """Converts full movie rows into (title, movie) pairs."""
+    return ((row[0], _row_to_movie(row[1:])) for row in rows)
+
+
+class SqliteMovieView(Mapping):
+    """
+    Read-only dict-like view over the movies table.
+
+    Lookups, membership tests and len() run a single indexed query, and iteration streams
+    rows from a cursor, so nothing is loaded until a caller actually asks for it.
+    """
+
+    def __init__(self, storage):
+        self._storage = storage
+
+    def __getitem__(self, title):
+        row = self._storage._query_one(
+            "SELECT year, rating, poster, imdb_link, country_code, notes FROM movies WHERE title = ?",
+            (title,))
+        if row is None:
+            raise KeyError(title)
+        return _row_to_movie(row)
+
+    def __contains__(self, title):
+        return self._storage._query_one("SELECT 1 FROM movies WHERE title = ?", (title,)) is not None
+
+    def __iter__(self):
+        for (title,) in self._storage._query_all("SELECT title FROM movies"):
+            yield title
+
+    def __len__(self):
+        return self._storage._query_one("SELECT COUNT(*) FROM movies")[0]
+
+    def items(self):
+        """Streams (title, movie) pairs in one pass over the table."""
+        return _to_items(self._storage._query_all(SELECT_MOVIE))
+
+    def values(self):
+        """Streams movie dicts in one pass over the table."""
+        return (movie for _, movie in self.items())
+
+
+class StorageSqlite(IStorage):
+    """
+    IStorage interface implementation for storing movie data in an SQLite database.
+
+    Title is the primary key and rating, year and country_code are indexed, so single
+    movie lookups, updates and deletes touch one row instead of the whole library.
+    """
+
+    def __init__(self, file_path):
+        """
+        Initialize the StorageSqlite instance.
+
+        Args:
+            file_path (str): The path to the SQLite database file.
+        """
+        self.file_path = file_path
+        self._lock = threading.RLock()
+        self._in_batch = False
+        self._db = None
+
+    @property
+    def _connection(self):
+        """The database connection, opened and set up on first use."""
+        if self._db is None:
+            with self._lock:
+                if self._db is None:
+                    import sqlite3  # loaded on first use, so opening other backends does not pay for it
+                    connection = sqlite3.connect(self.file_path, check_same_thread=False)
+                    with connection:
+                        connection.execute("PRAGMA journal_mode=WAL")
+                        connection.execute(
+                            "CREATE TABLE IF NOT EXISTS movies ("
+                            "title TEXT PRIMARY KEY, year TEXT, rating REAL, poster TEXT, "
+                            "imdb_link TEXT, country_code TEXT, notes TEXT)")
+                        connection.execute("CREATE INDEX IF NOT EXISTS idx_movies_rating ON movies (rating)")
+                        connection.execute("CREATE INDEX IF NOT EXISTS idx_movies_year ON movies (year)")
+                        connection.execute(
+                            "CREATE INDEX IF NOT EXISTS idx_movies_country_code ON movies (country_code)")
+                    self._db = connection
+        return self._db
+
+    def _query_one(self, sql, params=()):
+        """Runs a query and returns its first row."""
+        with self._lock:
+            return self._connection.execute(sql, params).fetchone()
+
+    def _query_all(self, sql, params=()):
+        """Runs a query and yields its rows in batches, so large results are never held at once."""
+        with self._lock:
+            cursor = self._connection.cursor()
+            cursor.execute(sql, params)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(1000)
+            if not rows:
+                break
+            yield from rows
+
+    def _execute(self, sql, params=()):
+        """
+        Runs a statement and returns the number of affected rows.
+
+        Outside a batch every statement is committed on its own.
+        """
+        with self._lock:
+            if self._in_batch:
+                return self._connection.execute(sql, params).rowcount
+            with self._connection:
+                return self._connection.execute(sql, params).rowcount
+
+    def _execute_many(self, sql, rows):
+        """Runs a statement for every row in one transaction and returns the number of affected rows."""
+        with self._lock:
+            if self._in_batch:
+                return self._connection.executemany(sql, rows).rowcount
+            with self._connection:
+                return self._connection.executemany(sql, rows).rowcount
+
+    @contextmanager
+    def batch(self):
+        """
+        Run all changes made inside the block in one transaction.
+
+        The transaction is committed when the block ends and rolled back if it raises.
+        """
+        with self._lock:
+            if self._in_batch:
+                yield self
+                return
+            self._in_batch = True
+            try:
+                with self._connection:
+                    yield self
+            finally:
+                self._in_batch = False
+
+    def list_movies(self):
+        """List all movies from storage as a lazy dict-like view."""
+        return SqliteMovieView(self)
+
+    def add_movie(self, title, year, rating, poster, imdb_link, country_code, notes=None):
+        """
+        Add a new movie to the database, replacing a movie with the same title.
+        """
+        self._execute(
+            "INSERT OR REPLACE INTO movies (title, year, rating, poster, imdb_link, country_code, notes) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (title, year, rating or 0.0, poster, imdb_link, country_code, notes or None))
+
+    def add_many(self, movies):
+        """
+        Add several movies to the database in one transaction.
+        """
+        rows = [(movie['title'], movie['year'], movie['rating'] or 0.0, movie['poster'], movie['imdb_link'],
+                 movie['country_code'], movie.get('notes') or None) for movie in movies]
+        self._execute_many(
+            "INSERT OR REPLACE INTO movies (title, year, rating, poster, imdb_link, country_code, notes) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def delete_movie(self, title):
+        """
+        Delete a movie from the database by its title.
+        """
+        if not self._execute("DELETE FROM movies WHERE title = ?", (title,)):
+            print(f"Movie with title '{title}' not found in storage.")
+
+    def delete_many(self, titles):
+        """
+        Delete several movies from the database in one transaction.
+        """
+        with self.batch():
+            for title in titles:
+                self.delete_movie(title)
+
+    def update_movie(self, title, rating, notes=None):
+        """
+        Update the rating of an existing movie in the database.
+        """
+        if notes is not None:
+            updated = self._execute("UPDATE movies SET rating = ?, notes = ? WHERE title = ?",
+                                    (rating, notes, title))
+        else:
+            updated = self._execute("UPDATE movies SET rating = ? WHERE title = ?", (rating, title))
+        if not updated:
+            print(f"Movie with title '{title}' not found in storage.")
+
+    def update_many(self, updates):
+        """
+        Update several movies in the database in one transaction.
+        """
+        with self.batch():
+            for update in updates:
+                self.update_movie(update['title'], update['rating'], update.get('notes'))
+
+    def get(self, title):
+        """
+        Return the details of a movie by its title using the primary key.
+        """
+        return self.list_movies().get(title)
+
+    def get_many(self, titles):
+        """
+        Return the (title, details) pairs of the given titles, looked up by primary key a few hundred at a time.
+        """
+        titles = list(titles)
+        found = {}
+        for start in range(0, len(titles), TITLES_PER_QUERY):
+            chunk = titles[start:start + TITLES_PER_QUERY]
+            sql = SELECT_MOVIE + f" WHERE title IN ({', '.join('?' * len(chunk))})"
+            found.update(_to_items(self._query_all(sql, chunk)))
+        return [(title, found[title]) for title in titles if title in found]
+
+    def search(self, substring, limit=None):
+        """
+        Return (title, details) pairs whose title contains the substring, ignoring case.
+        """
+        pattern = "%" + substring.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        sql = SELECT_MOVIE + " WHERE title LIKE ? ESCAPE '\\'"
+        params = (pattern,)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (limit,)
+        return list(_to_items(self._query_all(sql, params)))
+
+    def top_n(self, by='rating', n=None):
+        """
+        Return (title, details) pairs ordered by a field, highest first and ties by title.
+        """
+        if by not in SORTABLE_COLUMNS:
+            raise ValueError(f"Cannot order movies by '{by}'.")
+        sql = SELECT_MOVIE + f" ORDER BY {by} DESC, title"
+        params = ()
+        if n is not None:
+            sql += " LIMIT ?"
+            params = (n,)
+        return list(_to_items(self._query_all(sql, params)))
+
+    def aggregate_stats(self):
+        """
+        Return rating statistics for the library, or None if it is empty.
+
+        Count and average come from one aggregate query. Median, best and worst walk the
+        rating index, so only a handful of rows are read.
+        """
+        count, average = self._query_one("SELECT COUNT(*), AVG(rating) FROM movies")
+        if not count:
+            return None
+        middle = [rating for (rating,) in self._query_all(
+            "SELECT rating FROM movies ORDER BY rating LIMIT ? OFFSET ?",
+            (2 - count % 2, (count - 1) // 2))]
+        best = self._query_one(SELECT_MOVIE + " ORDER BY rating DESC LIMIT 1")
+        worst = self._query_one(SELECT_MOVIE + " ORDER BY rating LIMIT 1")
+        return {
+            'count': count,
+            'average': average,
+            'median': sum(middle) / len(middle),
+            'best': (best[0], _row_to_movie(best[1:])),
+            'worst': (worst[0], _row_to_movie(worst[1:])),
+        }
+
+    def sample(self, k=1):
+        """
+        Return up to k distinct (title, details) pairs picked at random.
+        """
+        count = self._query_one("SELECT COUNT(*) FROM movies")[0]
+        picks = []
+        for offset in random.sample(range(count), min(k, count)):
+            row = self._query_one(SELECT_MOVIE + " LIMIT 1 OFFSET ?", (offset,))
+            picks.append((row[0], _row_to_movie(row[1:])))
+        return picks
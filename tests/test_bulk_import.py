@@ -0,0 +1,117 @@
+import pytest
+from unittest import mock
+from movie_app_project.benchmarks.omdb_stub import NOT_FOUND, start_omdb_stub
+from movie_app_project.bulk_import import BulkImporter
+from movie_app_project.omdb import OmdbClient
+from movie_app_project.storage_json import StorageJson
+
+
+@pytest.fixture
+def stub():
+    """Starts an OMDb stub with the given scripted answers and stops it after the test."""
+    servers = []
+
+    def start(responses=None):
+        server, url = start_omdb_stub(responses, timeout_delay=0.5)
+        servers.append(server)
+        return server, OmdbClient(base_url=url, timeout=0.2)
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = StorageJson(str(tmp_path / "library.json"))
+    storage.add_movie("Known", "1999", 8.0, "", "", "US")
+    return storage
+
+
+def _requests_for(server, title):
+    """Number of lookups the stub received for a title."""
+    return sum(1 for _, looked_up in server.requests if looked_up == title)
+
+
+def test_retries_server_errors_with_backoff(stub, storage):
+    server, omdb = stub({'Flaky': [503, 500]})
+    importer = BulkImporter(storage, omdb, rate_limit=None, retries=3, backoff=0.05)
+
+    result = importer.import_entries(['Flaky'])
+
+    assert result['added'] == ['Flaky']
+    assert _requests_for(server, 'Flaky') == 3
+    times = [at for at, title in server.requests if title == 'Flaky']
+    # The waits double: 0.05 s before the second attempt, 0.1 s before the third
+    assert times[1] - times[0] >= 0.05
+    assert times[2] - times[1] >= 0.1
+
+
+def test_retries_timeouts(stub, storage):
+    server, omdb = stub({'Slow': ['timeout']})
+    importer = BulkImporter(storage, omdb, rate_limit=None, retries=2, backoff=0.01)
+
+    result = importer.import_entries(['Slow'])
+
+    assert result['added'] == ['Slow']
+    assert _requests_for(server, 'Slow') == 2
+
+
+def test_gives_up_after_the_last_retry(stub, storage):
+    server, omdb = stub({'Down': [500] * 5})
+    importer = BulkImporter(storage, omdb, rate_limit=None, retries=2, backoff=0.01)
+
+    result = importer.import_entries(['Down'])
+
+    assert result['failed'] == ['Down']
+    assert _requests_for(server, 'Down') == 3
+
+
+def test_does_not_retry_client_errors(stub, storage):
+    server, omdb = stub({'Unauthorized': [401]})
+    importer = BulkImporter(storage, omdb, rate_limit=None, retries=3, backoff=0.01)
+
+    result = importer.import_entries(['Unauthorized'])
+
+    assert result['failed'] == ['Unauthorized']
+    assert _requests_for(server, 'Unauthorized') == 1
+
+
+def test_respects_the_rate_limit(stub, storage):
+    server, omdb = stub()
+    importer = BulkImporter(storage, omdb, workers=8, rate_limit=20)
+
+    result = importer.import_entries([f"Movie {number}" for number in range(10)])
+
+    assert len(result['added']) == 10
+    times = sorted(at for at, _ in server.requests)
+    # 10 requests at 20 per second are spread over at least 9 intervals of 50 ms
+    assert times[-1] - times[0] >= 9 * 0.05 * 0.9
+
+
+def test_accounts_for_every_entry(stub, storage):
+    server, omdb = stub({'Missing': [NOT_FOUND], 'Broken': [400]})
+    importer = BulkImporter(storage, omdb, rate_limit=None, retries=1, backoff=0.01)
+
+    result = importer.import_entries(['Known', 'New', 'New', 'Missing', 'Broken', 'tt0000002'])
+
+    assert result == {
+        'added': ['New', 'tt0000002'],
+        'skipped': ['Known', 'New'],
+        'not_found': ['Missing'],
+        'failed': ['Broken'],
+    }
+    assert set(storage.list_movies()) == {'Known', 'New', 'tt0000002'}
+
+
+def test_adds_the_whole_import_in_one_call(stub, storage):
+    server, omdb = stub()
+    importer = BulkImporter(storage, omdb, rate_limit=None)
+
+    with mock.patch.object(storage, 'add_many', wraps=storage.add_many) as add_many:
+        importer.import_entries([f"Movie {number}" for number in range(25)])
+        importer.import_entries(['Known', 'Movie 1'])
+
+    add_many.assert_called_once()
+    assert len(list(add_many.call_args.args[0])) == 25
+    assert len(storage.list_movies()) == 26
@@ -0,0 +1,12 @@
+from movie_app_project.benchmarks.import_time import (BUDGET_MS, ENTRY_MODULE, loaded_deferred_modules,
+                                                      measure_imports)
+
+
+def test_startup_does_not_load_deferred_modules():
+    assert loaded_deferred_modules(ENTRY_MODULE) == []
+
+
+def test_startup_stays_within_the_import_budget():
+    # The fastest of a few fresh interpreters, so a busy machine does not fail the test by chance
+    fastest_ms = min(measure_imports(ENTRY_MODULE)[ENTRY_MODULE][1] for _ in range(5)) / 1000
+    assert fastest_ms <= BUDGET_MS
@@ -0,0 +1,34 @@
+import asyncio
+import pytest
+from movie_app_project.benchmarks.omdb_stub import start_omdb_stub
+from movie_app_project.omdb import OmdbClient
+from movie_app_project.rating_refresh import RatingRefresher
+from movie_app_project.storage_json import StorageJson
+
+
+@pytest.fixture
+def omdb():
+    """An OMDb client talking to a stub that has no rating for 'Unrated'."""
+    unrated = {'Response': 'True', 'Title': 'Unrated', 'Year': '2026', 'imdbRating': 'N/A'}
+    server, url = start_omdb_stub({'Unrated': [unrated]})
+    yield OmdbClient(base_url=url, timeout=1)
+    server.shutdown()
+
+
+def test_keeps_the_stored_rating_when_omdb_has_none(omdb, tmp_path):
+    storage = StorageJson(str(tmp_path / "library.json"))
+    storage.add_movie("Unrated", "2026", 6.5, "", "", "US")
+    storage.add_movie("Rated", "2001", 5.0, "", "", "US")
+
+    changes = asyncio.run(RatingRefresher(storage, omdb).run())
+
+    # The stub rates every other title 7.1
+    assert changes == [("Rated", 5.0, 7.1)]
+    assert storage.get("Unrated")['rating'] == 6.5
+    assert storage.get("Rated")['rating'] == 7.1
+
+
+def test_parse_leaves_a_missing_rating_empty():
+    assert OmdbClient.parse({'Response': 'True', 'Title': 'Unrated', 'imdbRating': 'N/A'})['rating'] is None
+    assert OmdbClient.parse({'Response': 'True', 'Title': 'Unrated'})['rating'] is None
+    assert OmdbClient.parse({'Response': 'True', 'Title': 'Rated', 'imdbRating': '7.1'})['rating'] == 7.1
@@ -0,0 +1,273 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+
+GRID_PLACEHOLDER = '__TEMPLATE_MOVIE_GRID__'
+TITLE_PLACEHOLDER = '__TEMPLATE_TITLE__'
+PAGINATION_PLACEHOLDER = '__TEMPLATE_PAGINATION__'
+MANIFEST_NAME = 'manifest.json'
+
+
+def movie_digest(title, details):
+    """Returns a content hash of everything that ends up in a movie's grid entry."""
+    content = "\0".join(str(value) for value in (
+        title,
+        details['year'],
+        details['rating'],
+        details['poster'],
+        details.get('imdb_link'),
+        details.get('country_code'),
+        details.get('notes'),
+    ))
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def render_movie(title, details):
+    """Renders the <li> grid entry for a single movie."""
+    notes = details.get('notes', '')
+    imdb_link = details.get('imdb_link', '#')
+    country_flag_url = f"https://flagcdn.com/32x24/{details['country_code'].lower()}.png" \
+        if details.get('country_code') else ""
+
+    flag_img_tag = f"<img src='{country_flag_url}' alt='Country Flag' class='country-flag' />" \
+        if country_flag_url else ""
+
+    return (f"<li class='movie'>\
+                    <a href='{imdb_link}' target='_blank'><img src='{details['poster']}' \
+                    alt='Movie Poster' class='movie-poster'></a>\
+                    <div class='movie-details'>\
+                    <div class='movie-title'>{title}</div>\
+                    <div class='movie-year'>{details['year']}</div>\
+                    <div class='movie-rating'>Rating: {details['rating']}</div>\
+                    {flag_img_tag}\
+                    <div class='movie-notes'>{notes}</div>\
+                    </div></li>\n")
+
+
+class WebsiteGenerator:
+    """
+    Streams the movie grid into the HTML template.
+
+    Grid entries are written to the output file in chunks as they are rendered, so the
+    page is never held in memory as one string.
+    """
+
+    def __init__(self, template_path, chunk_size=256):
+        """
+        Initialize the WebsiteGenerator instance.
+
+        Args:
+            template_path (str): The path to the HTML template.
+            chunk_size (int): Number of grid entries buffered per write.
+        """
+        self.template_path = template_path
+        self._chunk_size = chunk_size
+        self._template = None
+
+    def _template_parts(self):
+        """Reads the template once and splits it around the movie grid placeholder."""
+        if self._template is None:
+            with open(self.template_path, 'r') as file:
+                head, _, tail = file.read().partition(GRID_PLACEHOLDER)
+            self._template = head, tail
+        return self._template
+
+    def render_grid(self, movies):
+        """Yield the grid entry of every movie."""
+        for title, details in movies.items():
+            yield render_movie(title, details)
+
+    def generate(self, movies, output_path, title="My Movie App"):
+        """
+        Write the website for the given movies.
+
+        The page is streamed into a temporary file next to the output, which then replaces
+        the output in one step, so readers never see a half-written page.
+        """
+        head, tail = self._template_parts()
+        temp_path = output_path + ".tmp"
+        with open(temp_path, 'w') as file:
+            file.write(head.replace(TITLE_PLACEHOLDER, title))
+            chunk = []
+            for fragment in self.render_grid(movies):
+                chunk.append(fragment)
+                if len(chunk) >= self._chunk_size:
+                    file.writelines(chunk)
+                    chunk.clear()
+            file.writelines(chunk)
+            file.write(tail.replace(TITLE_PLACEHOLDER, title))
+        os.replace(temp_path, output_path)
+
+
+def _slug(value):
+    """Turns a year or country code into a file name friendly string."""
+    return re.sub(r'[^A-Za-z0-9]+', '-', str(value or '')).strip('-').lower() or 'unknown'
+
+
+def _write_atomic(path, content):
+    """Writes a file through a temporary file, so readers never see a partial page."""
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w') as file:
+        file.write(content)
+    os.replace(temp_path, path)
+
+
+def render_page(job):
+    """
+    Renders one page of the paginated site.
+
+    Runs in worker processes, so it only depends on the job tuple:
+    (template, page title, grid entries, pagination html). Grid entries are either
+    (title, details) pairs or pre-rendered html strings.
+    """
+    template, page_title, entries, pagination = job
+    grid = "".join(entry if isinstance(entry, str) else render_movie(*entry) for entry in entries)
+    return (template.replace(TITLE_PLACEHOLDER, page_title)
+            .replace(GRID_PLACEHOLDER, grid)
+            .replace(PAGINATION_PLACEHOLDER, pagination))
+
+
+class PaginatedSiteGenerator:
+    """
+    Writes the library as a directory of fixed-size pages.
+
+    Besides the main listing, optional per-year and per-country sections get their own
+    pages and an index page linking to them. A manifest.json records every page with a
+    digest of its content, so a regeneration only rewrites the pages whose movies,
+    title or navigation changed. Changed pages are rendered across a process pool.
+    """
+
+    def __init__(self, template_path, stylesheet_path, page_size=100, by_year=False, by_country=False,
+                 workers=None):
+        """
+        Initialize the PaginatedSiteGenerator instance.
+
+        Args:
+            template_path (str): The path to the page template.
+            stylesheet_path (str): The stylesheet copied next to the pages.
+            page_size (int): Number of movies per page.
+            by_year (bool): Also write per-year pages and a years.html index.
+            by_country (bool): Also write per-country pages and a countries.html index.
+            workers (int): Size of the render process pool. None uses one per CPU,
+                1 renders in this process.
+        """
+        self.template_path = template_path
+        self.stylesheet_path = stylesheet_path
+        self.page_size = page_size
+        self.by_year = by_year
+        self.by_country = by_country
+        self.workers = workers
+
+    def _sections(self, movies):
+        """Returns (file prefix, heading, [(title, details)]) for every section of the site."""
+        items = list(movies.items())
+        sections = [('page', None, items)]
+        for enabled, field, heading in ((self.by_year, 'year', 'Year'),
+                                        (self.by_country, 'country_code', 'Country')):
+            if not enabled:
+                continue
+            groups = {}
+            for title, details in items:
+                groups.setdefault(details.get(field) or 'Unknown', []).append((title, details))
+            used = set()
+            for value in sorted(groups, key=str):
+                slug = _slug(value)
+                # Values like "2011" and "2011–" share a slug, the later ones get a hash of the value appended
+                if slug in used:
+                    slug += "-" + hashlib.blake2b(str(value).encode("utf-8"), digest_size=4).hexdigest()
+                used.add(slug)
+                sections.append((f"{field.split('_')[0]}-{slug}", f"{heading} {value}", groups[value]))
+        return sections
+
+    def _page_jobs(self, template, sections, title):
+        """Splits the sections into pages and returns {file name: (digest, render job)}."""
+        jobs = {}
+        for prefix, heading, items in sections:
+            chunks = [items[start:start + self.page_size] for start in range(0, len(items), self.page_size)]
+            chunks = chunks or [[]]
+            for number, chunk in enumerate(chunks, start=1):
+                links = []
+                if number > 1:
+                    links.append(f"<a href='{prefix}-{number - 1}.html'>&laquo; Previous</a>")
+                links.append(f"<span>Page {number} of {len(chunks)}</span>")
+                if number < len(chunks):
+                    links.append(f"<a href='{prefix}-{number + 1}.html'>Next &raquo;</a>")
+                page_title = f"{title} - {heading}" if heading else title
+                job = (template, page_title, chunk, "".join(links))
+                digest = hashlib.blake2b(digest_size=16)
+                digest.update("\0".join((template, page_title, job[3])).encode("utf-8"))
+                for movie_title, details in chunk:
+                    digest.update(movie_digest(movie_title, details).encode("ascii"))
+                jobs[f"{prefix}-{number}.html"] = digest.hexdigest(), job
+        return jobs
+
+    def _index_jobs(self, template, sections, title):
+        """Returns {file name: (digest, render job)} for the per-year and per-country index pages."""
+        jobs = {}
+        for kind, heading, file_name in (('year', 'Years', 'years.html'), ('country', 'Countries', 'countries.html')):
+            entries = [f"<li class='movie-index'><a href='{prefix}-1.html'>{section_heading}</a> "
+                       f"({len(items)} movies)</li>\n"
+                       for prefix, section_heading, items in sections if prefix.startswith(kind + '-')]
+            if not entries:
+                continue
+            job = (template, f"{title} - {heading}", entries, "<a href='page-1.html'>All movies</a>")
+            content = "\0".join((template, job[1], job[3]) + tuple(entries))
+            jobs[file_name] = hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest(), job
+        return jobs
+
+    def _render(self, jobs):
+        """Renders the given jobs, in a process pool when there is enough work to share."""
+        if self.workers == 1 or len(jobs) < 2:
+            return [render_page(job) for job in jobs]
+        from concurrent.futures import ProcessPoolExecutor  # loads multiprocessing, so only when pages are rendered
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(render_page, jobs, chunksize=4))
+
+    def generate(self, movies, output_dir, title="My Movie App"):
+        """
+        Write the paginated site for the given movies into output_dir.
+
+        Returns:
+            int: The number of pages that were (re)written.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        with open(self.template_path, 'r') as file:
+            template = file.read()
+
+        sections = self._sections(movies)
+        pages = self._page_jobs(template, sections, title)
+        pages.update(self._index_jobs(template, sections, title))
+
+        manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+        try:
+            with open(manifest_path, 'r') as file:
+                previous = json.load(file).get('pages', {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            previous = {}
+
+        changed = [name for name, (digest, _) in pages.items()
+                   if previous.get(name, {}).get('digest') != digest
+                   or not os.path.exists(os.path.join(output_dir, name))]
+        for name, content in zip(changed, self._render([pages[name][1] for name in changed])):
+            _write_atomic(os.path.join(output_dir, name), content)
+
+        for name in previous.keys() - pages.keys():
+            try:
+                os.remove(os.path.join(output_dir, name))
+            except FileNotFoundError:
+                pass
+
+        stylesheet = os.path.join(output_dir, os.path.basename(self.stylesheet_path))
+        if not os.path.exists(stylesheet) or os.path.getmtime(stylesheet) < os.path.getmtime(self.stylesheet_path):
+            shutil.copyfile(self.stylesheet_path, stylesheet)
+
+        manifest = {
+            'title': title,
+            'page_size': self.page_size,
+            'movies': len(sections[0][2]),
+            'pages': {name: {'digest': digest, 'movies': len(job[2])} for name, (digest, job) in pages.items()},
+        }
+        _write_atomic(manifest_path, json.dumps(manifest, indent=4))
+        return len(changed)